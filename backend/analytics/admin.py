@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ProductInteraction, DailyProductStats, DailyCategoryStats, UserBehaviorSummary
+from .models import ProductInteraction, DailyProductStats, DailyCategoryStats, RollupState, UserBehaviorSummary
 
 
 @admin.register(ProductInteraction)
@@ -27,6 +27,12 @@ class DailyCategoryStatsAdmin(admin.ModelAdmin):
     date_hierarchy = 'date'
 
 
+@admin.register(RollupState)
+class RollupStateAdmin(admin.ModelAdmin):
+    list_display = ['name', 'high_water_mark', 'last_run_at']
+    readonly_fields = ['name', 'high_water_mark', 'last_run_at']
+
+
 @admin.register(UserBehaviorSummary)
 class UserBehaviorSummaryAdmin(admin.ModelAdmin):
     list_display = ['product', 'user', 'session_key', 'viewed', 'added_to_cart', 'purchased', 'view_count']
@@ -0,0 +1,60 @@
+"""
+Reusable aggregate expressions over ProductInteraction.
+
+Every analytics report builds its counters and revenue from these, so the
+numbers in the dashboard, rollups and exports are computed the same way and
+always in the database.
+"""
+
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+# Stats field -> interaction type it counts
+COUNTERS = {
+    'views': 'view',
+    'clicks': 'click',
+    'add_to_cart': 'add_to_cart',
+    'remove_from_cart': 'remove_from_cart',
+    'purchases': 'purchase',
+}
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def counter_aggregates(prefix=''):
+    """
+    Conditional Count() per interaction type, keyed by stats field name.
+
+    ``prefix`` is the lookup path to the interaction from the queried model,
+    e.g. ``'interactions__'`` when aggregating over Product.
+    """
+    return {
+        field: Count(f'{prefix}id', filter=Q(**{f'{prefix}interaction_type': interaction_type}))
+        for field, interaction_type in COUNTERS.items()
+    }
+
+
+def purchase_revenue(prefix=''):
+    """
+    Sum of quantity x unit price paid over purchase interactions.
+
+    Rows without a recorded unit price (e.g. older rows that could not be
+    matched to an order by ``backfill_interaction_columns``) fall back to
+    the product's current price.
+    """
+    unit_price = Coalesce(
+        F(f'{prefix}unit_price'),
+        F(f'{prefix}product__discount_price'),
+        F(f'{prefix}product__price'),
+    )
+    quantity = Coalesce(F(f'{prefix}quantity'), Value(1))
+    return Coalesce(
+        Sum(unit_price * quantity, filter=Q(**{f'{prefix}interaction_type': 'purchase'}), output_field=MONEY),
+        Value(0),
+        output_field=MONEY,
+    )
+
+
+def unique_visitors(prefix=''):
+    """Distinct registered users plus distinct anonymous sessions."""
+    return Count(f'{prefix}user', distinct=True) + Count(f'{prefix}session_key', distinct=True)
@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+from core.search_indexes import reinstall_after_migrate
+
+SEARCH_INDEX_MIGRATION = ('analytics', '0007_history_search_indexes')
+# Columns searched by the interaction history (see InteractionHistoryView.search_interactions)
+SEARCH_INDEX_COLUMNS = [('products', 'name'), ('users', 'email')]
+
+
+class AnalyticsConfig(AppConfig):
+    name = 'analytics'
+    
+    def ready(self):
+        post_migrate.connect(
+            reinstall_after_migrate(SEARCH_INDEX_MIGRATION, SEARCH_INDEX_COLUMNS), sender=self, weak=False
+        )
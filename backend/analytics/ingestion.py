@@ -0,0 +1,332 @@
+"""
+Write path for product interactions.
+
+``save_interactions`` persists a batch of unsaved ``ProductInteraction``
+instances with one ``bulk_create`` and one batched upsert of the matching
+``UserBehaviorSummary`` rows. In ``async`` ingestion mode, events are handed
+to an in-process ``InteractionBuffer`` and a background thread flushes them
+through the same function, so requests never wait on analytics writes.
+Interactions carry the time they were tracked in ``created_at``, so a batch
+flushed later still lands on the right day for the rollup.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import ProductInteraction, UserBehaviorSummary
+
+logger = logging.getLogger(__name__)
+
+INGESTION_DEFAULTS = {
+    'MODE': 'sync',
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 2.0,
+    'MAX_QUEUE_SIZE': 10000,
+    'ENQUEUE_TIMEOUT': 0.05,
+    'OVERFLOW': 'write',
+}
+
+SUMMARY_UPDATE_FIELDS = [
+    'viewed', 'clicked', 'added_to_cart', 'removed_from_cart', 'purchased',
+    'first_view_at', 'last_view_at', 'added_to_cart_at', 'removed_from_cart_at',
+    'purchased_at', 'view_count', 'cart_add_count', 'cart_remove_count',
+    'purchase_count', 'updated_at',
+]
+
+
+def get_ingestion_settings():
+    """Return the ingestion settings merged over the defaults."""
+    return {**INGESTION_DEFAULTS, **getattr(settings, 'ANALYTICS_INGESTION', {})}
+
+
+def apply_behavior(summary, interaction_type, when):
+    """Apply a single interaction to a behavior summary (without saving)."""
+    if interaction_type == 'view':
+        summary.viewed = True
+        summary.view_count += 1
+        if not summary.first_view_at:
+            summary.first_view_at = when
+        summary.last_view_at = when
+
+    elif interaction_type == 'click':
+        summary.clicked = True
+
+    elif interaction_type == 'add_to_cart':
+        summary.added_to_cart = True
+        summary.cart_add_count += 1
+        summary.added_to_cart_at = when
+        # Reset removed flag when added again
+        summary.removed_from_cart = False
+
+    elif interaction_type == 'remove_from_cart':
+        summary.removed_from_cart = True
+        summary.cart_remove_count += 1
+        summary.removed_from_cart_at = when
+
+    elif interaction_type == 'purchase':
+        summary.purchased = True
+        summary.purchase_count += 1
+        summary.purchased_at = when
+
+
+def _summary_key(user_id, session_key, product_id):
+    if user_id:
+        return ('user', user_id, product_id)
+    if session_key:
+        return ('session', session_key, product_id)
+    return None
+
+
+def _load_summaries(keys):
+    """Fetch existing summaries for the given keys in at most two queries."""
+    user_keys = [k for k in keys if k[0] == 'user']
+    session_keys = [k for k in keys if k[0] == 'session']
+    found = {}
+
+    if user_keys:
+        queryset = UserBehaviorSummary.objects.filter(
+            user_id__in={k[1] for k in user_keys},
+            product_id__in={k[2] for k in user_keys},
+        )
+        for summary in queryset:
+            found[('user', summary.user_id, summary.product_id)] = summary
+
+    if session_keys:
+        queryset = UserBehaviorSummary.objects.filter(
+            user__isnull=True,
+            session_key__in={k[1] for k in session_keys},
+            product_id__in={k[2] for k in session_keys},
+        )
+        for summary in queryset:
+            found[('session', summary.session_key, summary.product_id)] = summary
+
+    return {key: found[key] for key in keys if key in found}
+
+
+def _get_or_create_summary(key):
+    kind, owner, product_id = key
+    if kind == 'user':
+        summary, _ = UserBehaviorSummary.objects.get_or_create(
+            user_id=owner,
+            product_id=product_id,
+            defaults={'session_key': None}
+        )
+    else:
+        summary, _ = UserBehaviorSummary.objects.get_or_create(
+            session_key=owner,
+            product_id=product_id,
+            user=None
+        )
+    return summary
+
+
+def upsert_behavior_summaries(interactions):
+    """
+    Fold a batch of saved interactions into ``UserBehaviorSummary`` rows.
+
+    Events are grouped per (user or session, product) and applied in order,
+    so a batch costs one read per owner type plus one bulk insert and one
+    bulk update, regardless of how many events it contains.
+    """
+    events = {}
+    for interaction in interactions:
+        key = _summary_key(interaction.user_id, interaction.session_key, interaction.product_id)
+        if key is not None:
+            events.setdefault(key, []).append(interaction)
+
+    if not events:
+        return
+
+    now = timezone.now()
+
+    def apply_events(key, summary):
+        for interaction in events[key]:
+            apply_behavior(summary, interaction.interaction_type, interaction.created_at or now)
+        summary.updated_at = now
+
+    existing = _load_summaries(list(events))
+    new = {}
+    for key in events:
+        if key in existing:
+            apply_events(key, existing[key])
+        else:
+            kind, owner, product_id = key
+            new[key] = UserBehaviorSummary(
+                user_id=owner if kind == 'user' else None,
+                session_key=owner if kind == 'session' else None,
+                product_id=product_id,
+            )
+            apply_events(key, new[key])
+
+    if new:
+        try:
+            with transaction.atomic():
+                UserBehaviorSummary.objects.bulk_create(list(new.values()))
+        except IntegrityError:
+            # Another writer created some of these rows concurrently; fall
+            # back to fetching or creating them one by one.
+            for key in new:
+                summary = _get_or_create_summary(key)
+                apply_events(key, summary)
+                existing[key] = summary
+
+    if existing:
+        UserBehaviorSummary.objects.bulk_update(list(existing.values()), SUMMARY_UPDATE_FIELDS)
+
+
+def save_interactions(interactions):
+    """Persist unsaved interactions and their behavior summaries in one transaction."""
+    interactions = list(interactions)
+    if not interactions:
+        return []
+
+    batch_size = get_ingestion_settings()['BATCH_SIZE']
+    with transaction.atomic():
+        created = ProductInteraction.objects.bulk_create(interactions, batch_size=batch_size)
+        upsert_behavior_summaries(created)
+    return created
+
+
+class InteractionBuffer:
+    """
+    Bounded in-process queue of interactions drained by a background thread.
+    
+    The worker flushes whenever ``batch_size`` events are waiting or
+    ``flush_interval`` seconds have passed. When the queue is full, callers
+    wait up to ``enqueue_timeout`` seconds and then either write the event
+    themselves (``overflow='write'``) or drop it (``overflow='drop'``).
+    """
+    
+    def __init__(self, batch_size=500, flush_interval=2.0, max_queue_size=10000,
+                 enqueue_timeout=0.05, overflow='write'):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.overflow = overflow
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self._pid = None
+    
+    def submit(self, interaction):
+        """Queue an interaction; return False if it could not be queued."""
+        self._ensure_worker()
+        try:
+            self._queue.put(interaction, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            if self.overflow == 'write':
+                save_interactions([interaction])
+            else:
+                logger.warning('Interaction buffer full, dropping %s event', interaction.interaction_type)
+            return False
+    
+    def flush(self):
+        """Synchronously write everything currently queued."""
+        while True:
+            batch = self._take(block=False)
+            if not batch:
+                break
+            self._write(batch)
+    
+    def stop(self):
+        """Stop the worker thread and write any remaining events."""
+        self._stop.set()
+        if self._worker is not None and self._worker.is_alive():
+            self._worker.join(timeout=self.flush_interval + 5)
+        self.flush()
+    
+    def _ensure_worker(self):
+        # Re-create the worker after a fork (e.g. gunicorn pre-fork workers),
+        # since threads do not survive into the child process.
+        if self._worker is not None and self._pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._pid == os.getpid() and self._worker.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._worker = threading.Thread(
+                target=self._run, name='analytics-ingestion', daemon=True
+            )
+            self._worker.start()
+    
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take(block=True)
+            if batch:
+                self._write(batch)
+    
+    def _take(self, block):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if block:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _write(self, batch):
+        close_old_connections()
+        try:
+            save_interactions(batch)
+        except Exception:
+            logger.exception('Failed to flush %d interactions', len(batch))
+        finally:
+            close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_interaction_buffer():
+    """Return the process-wide interaction buffer, creating it on first use."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                config = get_ingestion_settings()
+                _buffer = InteractionBuffer(
+                    batch_size=config['BATCH_SIZE'],
+                    flush_interval=config['FLUSH_INTERVAL'],
+                    max_queue_size=config['MAX_QUEUE_SIZE'],
+                    enqueue_timeout=config['ENQUEUE_TIMEOUT'],
+                    overflow=config['OVERFLOW'],
+                )
+                atexit.register(_buffer.stop)
+    return _buffer
+
+
+def ingest(interactions):
+    """Write interactions now or hand them to the buffer, depending on MODE."""
+    interactions = list(interactions)
+    if get_ingestion_settings()['MODE'] == 'async':
+        buffer = get_interaction_buffer()
+
+        def enqueue():
+            for interaction in interactions:
+                buffer.submit(interaction)
+
+        # Only hand events over once the surrounding transaction (e.g. the
+        # checkout) has committed, so rolled-back requests emit nothing.
+        transaction.on_commit(enqueue)
+    else:
+        save_interactions(interactions)
+    return interactions
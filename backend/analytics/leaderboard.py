@@ -0,0 +1,57 @@
+"""
+Product leaderboards for the admin dashboard.
+
+All counters for every product in a (days, category) window are computed in
+one pass over the daily stats (plus today's raw interactions) and cached for
+``ANALYTICS_LEADERBOARD_CACHE_TTL`` seconds; any top-N ordering is then a
+sort of the cached table.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from products.models import Product
+
+from .stats import product_totals
+
+CACHE_PREFIX = 'analytics:leaderboard'
+
+
+def _cache_key(days, category):
+    return f'{CACHE_PREFIX}:{days}:{category or "all"}'
+
+
+def build_leaderboard(days, category=None):
+    """Per-product counters and revenue for the window, with product details."""
+    totals = product_totals(days, category)
+    products = Product.objects.filter(id__in=totals).values(
+        'id', 'name', 'image', 'category__name'
+    )
+
+    rows = []
+    for product in products:
+        rows.append({
+            'product_id': product['id'],
+            'product_name': product['name'],
+            'product_image': product['image'],
+            'category_name': product['category__name'],
+            **totals[product['id']],
+        })
+    return rows
+
+
+def get_leaderboard(days, category=None):
+    """Cached ``build_leaderboard`` for the window."""
+    key = _cache_key(days, category)
+    rows = cache.get(key)
+    if rows is None:
+        rows = build_leaderboard(days, category)
+        cache.set(key, rows, getattr(settings, 'ANALYTICS_LEADERBOARD_CACHE_TTL', 60))
+    return rows
+
+
+def top_products(metric, days, limit, category=None):
+    """The ``limit`` products with the highest non-zero ``metric`` in the window."""
+    rows = [row for row in get_leaderboard(days, category) if row[metric]]
+    rows.sort(key=lambda row: row[metric], reverse=True)
+    return rows[:limit]
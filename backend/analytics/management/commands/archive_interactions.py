@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.retention import (
+    archive_interactions, archived_before, drop_archive_month,
+    export_archive_month, next_month,
+)
+
+
+class Command(BaseCommand):
+    help = 'Move rolled-up raw product interactions past the retention window into monthly archives'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'ANALYTICS_RETENTION_DAYS', 90),
+            help='Days of raw interactions to keep in the live table',
+        )
+        parser.add_argument(
+            '--export-dir',
+            help='Write every fully archived month touched by this run to <dir>/<table>.csv.gz',
+        )
+        parser.add_argument(
+            '--drop-exported',
+            action='store_true',
+            help='Drop archive months after they have been exported',
+        )
+    
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        if options['drop_exported'] and not options['export_dir']:
+            raise CommandError('--drop-exported requires --export-dir')
+        
+        moved = archive_interactions(options['days'])
+        if not moved:
+            self.stdout.write('No interactions to archive.')
+            return
+        
+        for month, count in moved:
+            self.stdout.write(f'{month:%Y-%m}: archived {count} interactions')
+        
+        if not options['export_dir']:
+            return
+        
+        # Only export months that can no longer receive rows, so an export is
+        # never overwritten by a smaller one later.
+        cutoff_day = timezone.localdate(archived_before())
+        for month, _ in moved:
+            if next_month(month) > cutoff_day:
+                continue
+            path = export_archive_month(month, options['export_dir'])
+            self.stdout.write(f'Exported {month:%Y-%m} to {path}')
+            if options['drop_exported']:
+                drop_archive_month(month)
+        
+        self.stdout.write(self.style.SUCCESS('Archiving complete'))
@@ -0,0 +1,101 @@
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from analytics.models import ProductInteraction
+from orders.models import Order, OrderItem
+
+
+class Command(BaseCommand):
+    help = 'Copy quantity/order_id from interaction metadata into the quantity, order and unit_price columns'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of interactions processed per transaction',
+        )
+    
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        
+        # Walk the table in (created_at, id) order so each chunk is a bounded
+        # range scan and rows that cannot be backfilled are never revisited.
+        queryset = ProductInteraction.objects.filter(
+            Q(quantity__isnull=True, metadata__has_key='quantity') |
+            Q(order__isnull=True, metadata__has_key='order_id')
+        ).only(
+            'id', 'created_at', 'product_id', 'interaction_type',
+            'metadata', 'quantity', 'unit_price', 'order_id'
+        ).order_by('created_at', 'id')
+        
+        processed = updated = 0
+        last = None
+        while True:
+            chunk = queryset
+            if last:
+                chunk = chunk.filter(
+                    Q(created_at__gt=last.created_at) |
+                    Q(created_at=last.created_at, id__gt=last.id)
+                )
+            chunk = list(chunk[:chunk_size])
+            if not chunk:
+                break
+            
+            updated += self.backfill_chunk(chunk)
+            processed += len(chunk)
+            last = chunk[-1]
+            self.stdout.write(f'Processed {processed} interactions ({updated} updated)')
+        
+        self.stdout.write(self.style.SUCCESS(f'Backfill complete: {updated} of {processed} interactions updated'))
+    
+    def backfill_chunk(self, interactions):
+        order_ids = set()
+        for interaction in interactions:
+            order_id = self.parse_uuid(interaction.metadata.get('order_id'))
+            if order_id:
+                order_ids.add(order_id)
+        
+        existing_orders = set(Order.objects.filter(id__in=order_ids).values_list('id', flat=True))
+        prices = {
+            (order_id, product_id): unit_price
+            for order_id, product_id, unit_price in OrderItem.objects.filter(
+                order_id__in=existing_orders
+            ).values_list('order_id', 'product_id', 'unit_price')
+        }
+        
+        changed = []
+        for interaction in interactions:
+            dirty = False
+            
+            quantity = interaction.metadata.get('quantity')
+            if interaction.quantity is None and isinstance(quantity, int) and quantity > 0:
+                interaction.quantity = quantity
+                dirty = True
+            
+            order_id = self.parse_uuid(interaction.metadata.get('order_id'))
+            if interaction.order_id is None and order_id in existing_orders:
+                interaction.order_id = order_id
+                dirty = True
+            
+            if interaction.unit_price is None and interaction.interaction_type == 'purchase':
+                unit_price = prices.get((interaction.order_id, interaction.product_id))
+                if unit_price is not None:
+                    interaction.unit_price = unit_price
+                    dirty = True
+            
+            if dirty:
+                changed.append(interaction)
+        
+        with transaction.atomic():
+            ProductInteraction.objects.bulk_update(changed, ['quantity', 'order', 'unit_price'])
+        return len(changed)
+    
+    def parse_uuid(self, value):
+        try:
+            return uuid.UUID(str(value))
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,163 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from analytics import views
+from analytics.models import ProductInteraction
+from analytics.rollup import rebuild_rollup, run_incremental_rollup
+from products.models import Product
+
+# Analytics endpoints whose queries are explained, with their query params
+ENDPOINTS = [
+    ('dashboard', views.DashboardOverviewView, {'days': 30}),
+    ('most-viewed', views.MostViewedProductsView, {'days': 30}),
+    ('most-added-to-cart', views.MostAddedToCartProductsView, {'days': 30}),
+    ('most-purchased', views.MostPurchasedProductsView, {'days': 30}),
+    ('time-series', views.TimeSeriesAnalyticsView, {'days': 30}),
+    ('categories', views.CategoryAnalyticsView, {'days': 30}),
+    ('funnel', views.FunnelAnalyticsView, {'days': 30}),
+    ('history', views.InteractionHistoryView, {'days': 7}),
+    ('export-csv', views.ExportAnalyticsView, {'days': 30, 'type': 'products'}),
+]
+
+# Index set the composite index replaced, used for the "before" plans
+LEGACY_INDEXES = [('product_int_created_5e3bab_idx', ['created_at'])]
+COMPOSITE_INDEXES = ['product_int_created_f0bfe6_idx']
+
+SEED_WEIGHTS = {
+    'view': 70,
+    'click': 10,
+    'add_to_cart': 10,
+    'remove_from_cart': 4,
+    'purchase': 6,
+}
+
+
+class Command(BaseCommand):
+    help = 'Show query plans and timings for analytics endpoints with and without the composite interaction index'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Insert this many synthetic interactions first (e.g. 10000000)',
+        )
+        parser.add_argument(
+            '--seed-days',
+            type=int,
+            default=180,
+            help='Spread seeded interactions over this many days',
+        )
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=[name for name, _, _ in ENDPOINTS],
+            help='Only explain these endpoints (repeatable)',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Use EXPLAIN ANALYZE where the database supports it',
+        )
+    
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'], options['seed_days'])
+        
+        run_incremental_rollup()
+        selected = options['endpoint']
+        endpoints = [e for e in ENDPOINTS if not selected or e[0] in selected]
+        
+        for name, view, params in endpoints:
+            queries = self.capture_queries(view, params)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {name} ({len(queries)} interaction queries)'))
+            for sql in queries:
+                self.stdout.write(f'\n{sql[:300]}{"..." if len(sql) > 300 else ""}')
+                after = self.explain(sql, options['analyze'])
+                before = self.explain_without_composites(sql, options['analyze'])
+                for label, (plan, elapsed) in (('before', before), ('after', after)):
+                    self.stdout.write(self.style.SUCCESS(f'-- {label}: {elapsed:.1f} ms'))
+                    self.stdout.write(plan)
+    
+    def seed(self, count, days):
+        product_ids = list(Product.objects.filter(is_active=True).values_list('id', flat=True))
+        if not product_ids:
+            raise CommandError('Seeding needs at least one active product')
+        
+        types = list(SEED_WEIGHTS)
+        weights = list(SEED_WEIGHTS.values())
+        now = timezone.now()
+        span = days * 24 * 3600
+        chunk_size = 10000
+        
+        self.stdout.write(f'Seeding {count} interactions over {days} days...')
+        for offset in range(0, count, chunk_size):
+            batch = []
+            for _ in range(min(chunk_size, count - offset)):
+                interaction_type = random.choices(types, weights)[0]
+                batch.append(ProductInteraction(
+                    product_id=random.choice(product_ids),
+                    session_key=f'seed{random.randrange(count // 20 + 1)}',
+                    interaction_type=interaction_type,
+                    quantity=1 if interaction_type in ('add_to_cart', 'purchase') else None,
+                    created_at=now - timedelta(seconds=random.randrange(span)),
+                ))
+            ProductInteraction.objects.bulk_create(batch)
+            self.stdout.write(f'  {offset + len(batch)}/{count}')
+        
+        self.stdout.write('Rebuilding daily stats...')
+        rebuild_rollup()
+    
+    def capture_queries(self, view, params):
+        """Run an endpoint as an admin and return the SELECTs that read product_interactions."""
+        admin = get_user_model()(email='explain@localhost', is_staff=True, is_admin=True)
+        request = APIRequestFactory().get('/', params)
+        force_authenticate(request, user=admin)
+        
+        with CaptureQueriesContext(connection) as context:
+            response = view.as_view()(request)
+            if hasattr(response, 'render'):
+                response.render()
+        
+        table = ProductInteraction._meta.db_table
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT') and table in query['sql']
+        ]
+    
+    def explain(self, sql, analyze=False):
+        options = {'analyze': True} if analyze and connection.vendor == 'postgresql' else {}
+        prefix = connection.ops.explain_query_prefix(**options)
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}')
+            plan = '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+            
+            started = time.perf_counter()
+            cursor.execute(sql)
+            cursor.fetchall()
+            elapsed = (time.perf_counter() - started) * 1000
+        return plan, elapsed
+    
+    def explain_without_composites(self, sql, analyze=False):
+        """Explain with the pre-composite index set, inside a rolled-back transaction."""
+        qn = connection.ops.quote_name
+        table = ProductInteraction._meta.db_table
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in COMPOSITE_INDEXES:
+                    cursor.execute(f'DROP INDEX {qn(name)}')
+                for name, columns in LEGACY_INDEXES:
+                    cursor.execute(
+                        f'CREATE INDEX {qn(name)} ON {qn(table)} ({", ".join(qn(c) for c in columns)})'
+                    )
+            result = self.explain(sql, analyze)
+            transaction.set_rollback(True)
+        return result
@@ -0,0 +1,42 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.rollup import rebuild_rollup, run_incremental_rollup
+
+
+class Command(BaseCommand):
+    help = 'Roll up raw product interactions into daily product and category stats'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild every day instead of only days after the high-water mark',
+        )
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to rebuild (YYYY-MM-DD)')
+    
+    def handle(self, *args, **options):
+        start = self.parse_date(options['start'])
+        end = self.parse_date(options['end'])
+        
+        if options['full'] or start or end:
+            result = rebuild_rollup(start, end)
+        else:
+            result = run_incremental_rollup()
+        
+        if result is None:
+            self.stdout.write('No new interactions to roll up.')
+            return
+        
+        first_day, last_day = result
+        self.stdout.write(self.style.SUCCESS(f'Rolled up daily stats for {first_day} to {last_day}'))
+    
+    def parse_date(self, value):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'Invalid date: {value} (expected YYYY-MM-DD)')
@@ -4,7 +4,8 @@ from django.utils import timezone
 from datetime import timedelta
 import random
 
-from analytics.models import ProductInteraction, DailyProductStats, UserBehaviorSummary
+from analytics.models import ProductInteraction, DailyProductStats, DailyCategoryStats, UserBehaviorSummary
+from analytics.rollup import rebuild_rollup
 from products.models import Product, Category
 
 User = get_user_model()
@@ -112,34 +113,8 @@ class Command(BaseCommand):
         self.stdout.write('Updating daily product stats...')
         
         DailyProductStats.objects.all().delete()
-        
-        for day_offset in range(30, 0, -1):
-            date = (timezone.now() - timedelta(days=day_offset)).date()
-            
-            for product in products:
-                interactions = ProductInteraction.objects.filter(
-                    product=product,
-                    created_at__date=date
-                )
-                
-                views = interactions.filter(interaction_type='view').count()
-                add_to_cart = interactions.filter(interaction_type='add_to_cart').count()
-                purchases = interactions.filter(interaction_type='purchase').count()
-                
-                if views > 0 or add_to_cart > 0 or purchases > 0:
-                    revenue = sum(
-                        float(product.final_price) * i.metadata.get('quantity', 1)
-                        for i in interactions.filter(interaction_type='purchase')
-                    )
-                    
-                    DailyProductStats.objects.create(
-                        product=product,
-                        date=date,
-                        view_count=views,
-                        cart_add_count=add_to_cart,
-                        purchase_count=purchases,
-                        revenue=revenue
-                    )
+        DailyCategoryStats.objects.all().delete()
+        rebuild_rollup()
         
         self.stdout.write('Daily stats updated')
     
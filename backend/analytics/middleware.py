@@ -9,9 +9,14 @@ class InteractionTrackingMiddleware:
         self.get_response = get_response
     
     def __call__(self, request):
-        # Ensure session exists for anonymous users
+        return self.get_response(request)
+    
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Ensure session exists for anonymous users, unless the view opts out
+        # (e.g. per-keystroke endpoints that never track anything)
+        view_class = getattr(view_func, 'view_class', None)
+        if not getattr(view_class, 'creates_session', True):
+            return None
         if not request.session.session_key:
             request.session.create()
-        
-        response = self.get_response(request)
-        return response
+        return None
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('high_water_mark', models.DateTimeField(blank=True, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Rollup State',
+                'verbose_name_plural': 'Rollup States',
+                'db_table': 'analytics_rollup_state',
+            },
+        ),
+        migrations.AddField(
+            model_name='dailycategorystats',
+            name='remove_from_cart',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailycategorystats',
+            name='unique_visitors',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_rollup_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productinteraction',
+            name='quantity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='productinteraction',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0004_interaction_quantity_unit_price'),
+        ('orders', '0004_stripe_migration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productinteraction',
+            name='order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='interactions', to='orders.order'),
+        ),
+    ]
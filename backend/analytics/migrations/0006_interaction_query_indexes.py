@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0005_interaction_order'),
+        ('orders', '0004_stripe_migration'),
+        ('products', '0002_product_image_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productinteraction',
+            name='product_int_created_5e3bab_idx',
+        ),
+        migrations.AddIndex(
+            model_name='productinteraction',
+            index=models.Index(fields=['interaction_type', 'created_at', 'product'], name='product_int_interac_1f304d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productinteraction',
+            index=models.Index(fields=['created_at', 'interaction_type', 'product'], name='product_int_created_f0bfe6_idx'),
+        ),
+    ]
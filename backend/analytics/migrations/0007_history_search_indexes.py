@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+from django.conf import settings
+from django.db import migrations
+
+
+def create_search_indexes(apps, schema_editor):
+    from analytics.apps import SEARCH_INDEX_COLUMNS
+    from core import search_indexes
+
+    search_indexes.install_search_indexes(schema_editor.connection, SEARCH_INDEX_COLUMNS)
+
+
+def drop_search_indexes(apps, schema_editor):
+    from analytics.apps import SEARCH_INDEX_COLUMNS
+    from core import search_indexes
+
+    search_indexes.drop_search_indexes(schema_editor.connection, SEARCH_INDEX_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0006_interaction_query_indexes'),
+        ('products', '0002_product_image_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0007_history_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyVisitorStats',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('user_sketch', models.BinaryField()),
+                ('session_sketch', models.BinaryField()),
+            ],
+            options={
+                'verbose_name': 'Daily Visitor Stats',
+                'verbose_name_plural': 'Daily Visitor Stats',
+                'db_table': 'daily_visitor_stats',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
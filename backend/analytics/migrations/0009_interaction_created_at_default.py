@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0008_daily_visitor_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='productinteraction',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0009_interaction_created_at_default'),
+        ('products', '0003_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailycategorystats',
+            index=models.Index(fields=['date', 'category'], name='daily_categ_date_c92826_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyproductstats',
+            index=models.Index(fields=['date', 'product'], name='daily_produ_date_cd669a_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:43
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0010_daily_stats_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productinteraction',
+            name='product_int_interac_1f304d_idx',
+        ),
+    ]
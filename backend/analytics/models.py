@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from products.models import Product, Category
 import uuid
 
@@ -29,10 +30,22 @@ class ProductInteraction(models.Model):
     session_key = models.CharField(max_length=40, null=True, blank=True)
     interaction_type = models.CharField(max_length=20, choices=INTERACTION_TYPES)
     metadata = models.JSONField(default=dict, blank=True)
+    # Recorded for cart and purchase events so revenue can be aggregated in SQL
+    quantity = models.PositiveIntegerField(null=True, blank=True)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    order = models.ForeignKey(
+        'orders.Order',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='interactions'
+    )
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     referrer = models.URLField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # When the event happened; set when the interaction is built, not when a
+    # buffered batch is written
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         db_table = 'product_interactions'
@@ -41,7 +54,9 @@ class ProductInteraction(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['product', 'interaction_type']),
-            models.Index(fields=['created_at']),
+            # Time slices (today's partial stats, rollups, retention, history);
+            # top-N reports read DailyProductStats instead
+            models.Index(fields=['created_at', 'interaction_type', 'product']),
             models.Index(fields=['user']),
             models.Index(fields=['session_key']),
         ]
@@ -69,6 +84,10 @@ class DailyProductStats(models.Model):
         db_table = 'daily_product_stats'
         unique_together = ['product', 'date']
         ordering = ['-date']
+        indexes = [
+            # Window reads filter on a date range across every product
+            models.Index(fields=['date', 'product']),
+        ]
     
     def __str__(self):
         return f"{self.product.name} - {self.date}"
@@ -83,18 +102,57 @@ class DailyCategoryStats(models.Model):
     views = models.PositiveIntegerField(default=0)
     clicks = models.PositiveIntegerField(default=0)
     add_to_cart = models.PositiveIntegerField(default=0)
+    remove_from_cart = models.PositiveIntegerField(default=0)
     purchases = models.PositiveIntegerField(default=0)
     revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    unique_visitors = models.PositiveIntegerField(default=0)
     
     class Meta:
         db_table = 'daily_category_stats'
         unique_together = ['category', 'date']
         ordering = ['-date']
+        indexes = [
+            # Window reads filter on a date range across every category
+            models.Index(fields=['date', 'category']),
+        ]
     
     def __str__(self):
         return f"{self.category.name} - {self.date}"
 
 
+class DailyVisitorStats(models.Model):
+    """HyperLogLog sketches of each day's distinct users and anonymous sessions."""
+    
+    date = models.DateField(primary_key=True)
+    user_sketch = models.BinaryField()
+    session_sketch = models.BinaryField()
+    
+    class Meta:
+        db_table = 'daily_visitor_stats'
+        ordering = ['-date']
+        verbose_name = 'Daily Visitor Stats'
+        verbose_name_plural = 'Daily Visitor Stats'
+    
+    def __str__(self):
+        return f"Visitors - {self.date}"
+
+
+class RollupState(models.Model):
+    """High-water mark of raw interactions already folded into the daily stats tables."""
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'analytics_rollup_state'
+        verbose_name = 'Rollup State'
+        verbose_name_plural = 'Rollup States'
+    
+    def __str__(self):
+        return f"{self.name} @ {self.high_water_mark}"
+
+
 class UserBehaviorSummary(models.Model):
     """Track user journey and behavior patterns."""
     
@@ -0,0 +1,193 @@
+"""
+Retention for the raw ``product_interactions`` table.
+
+Interactions older than the retention window are moved out of the live table
+once the daily rollup has covered them, so queries over recent windows only
+ever touch a bounded amount of data. On PostgreSQL archived rows go into
+``product_interactions_archive``, a table range-partitioned by month on
+``created_at``; on other backends (SQLite) every month gets its own plain
+archive table with the same name as the partition would have. Archived
+months can be exported to gzip-compressed CSV files and dropped.
+"""
+
+import csv
+import gzip
+import os
+from datetime import date, datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import ProductInteraction, RollupState
+from .rollup import RETENTION_NAME, archived_before, get_rollup_state, run_incremental_rollup
+
+LIVE_TABLE = ProductInteraction._meta.db_table
+ARCHIVE_TABLE = f'{LIVE_TABLE}_archive'
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def archive_table_name(month):
+    return f'{ARCHIVE_TABLE}_{month.year}_{month.month:02d}'
+
+
+def _aware(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def _db_value(value):
+    return connection.ops.adapt_datetimefield_value(value)
+
+
+def _columns(cursor, table):
+    return [col.name for col in connection.introspection.get_table_description(cursor, table)]
+
+
+def ensure_archive_table(cursor, month):
+    """Create the archive partition (PostgreSQL) or table (other backends) for a month."""
+    qn = connection.ops.quote_name
+    table = archive_table_name(month)
+
+    if connection.vendor == 'postgresql':
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {qn(ARCHIVE_TABLE)} '
+            f'(LIKE {qn(LIVE_TABLE)} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {qn(ARCHIVE_TABLE + "_created_idx")} '
+            f'ON {qn(ARCHIVE_TABLE)} (created_at, product_id)'
+        )
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {qn(table)} PARTITION OF {qn(ARCHIVE_TABLE)} '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [_aware(month), _aware(next_month(month))]
+        )
+    else:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {qn(table)} AS SELECT * FROM {qn(LIVE_TABLE)} WHERE 0 = 1'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {qn(table + "_created_idx")} ON {qn(table)} (created_at)'
+        )
+    return table
+
+
+def archive_range(start, end):
+    """
+    Move live rows with start <= created_at < end (within one month) into
+    the archive. Returns the number of rows moved.
+    """
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        table = ensure_archive_table(cursor, month_start(timezone.localdate(start)))
+        target = ARCHIVE_TABLE if connection.vendor == 'postgresql' else table
+
+        # Copy only columns both tables have, so archives created before a
+        # schema change keep working.
+        archive_columns = set(_columns(cursor, table))
+        columns = ', '.join(qn(c) for c in _columns(cursor, LIVE_TABLE) if c in archive_columns)
+        params = [_db_value(start), _db_value(end)]
+
+        cursor.execute(
+            f'INSERT INTO {qn(target)} ({columns}) SELECT {columns} FROM {qn(LIVE_TABLE)} '
+            f'WHERE created_at >= %s AND created_at < %s',
+            params
+        )
+        cursor.execute(
+            f'DELETE FROM {qn(LIVE_TABLE)} WHERE created_at >= %s AND created_at < %s',
+            params
+        )
+        return cursor.rowcount
+
+
+def retention_cutoff(retention_days, now=None):
+    """
+    Start of the oldest day that must stay live: ``retention_days`` ago, but
+    never past the last fully rolled-up day.
+    """
+    now = now or timezone.now()
+    cutoff_day = timezone.localdate(now) - timedelta(days=retention_days)
+
+    rolled_up = get_rollup_state().high_water_mark
+    if rolled_up is None:
+        return None
+    cutoff_day = min(cutoff_day, timezone.localdate(rolled_up))
+    return _aware(cutoff_day)
+
+
+def archive_interactions(retention_days, now=None):
+    """
+    Roll up pending days, then move everything older than the retention
+    cutoff into the archive one day at a time.
+
+    Returns a list of (month, rows_moved) for the months that were touched.
+    """
+    run_incremental_rollup(now)
+    cutoff = retention_cutoff(retention_days, now)
+    if cutoff is None:
+        return []
+
+    oldest = ProductInteraction.objects.filter(created_at__lt=cutoff).aggregate(
+        oldest=Min('created_at')
+    )['oldest']
+
+    moved = {}
+    if oldest is not None:
+        day = timezone.localdate(oldest)
+        cutoff_day = timezone.localdate(cutoff)
+        while day < cutoff_day:
+            month = month_start(day)
+            moved[month] = moved.get(month, 0) + archive_range(_aware(day), _aware(day + timedelta(days=1)))
+            day += timedelta(days=1)
+
+    previous = archived_before()
+    if previous is None or cutoff > previous:
+        RollupState.objects.update_or_create(
+            name=RETENTION_NAME,
+            defaults={'high_water_mark': cutoff, 'last_run_at': timezone.now()}
+        )
+    return sorted(moved.items())
+
+
+def export_archive_month(month, directory, chunk_size=5000):
+    """Write one archived month to ``<directory>/<table>.csv.gz``; returns the path."""
+    qn = connection.ops.quote_name
+    table = archive_table_name(month)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{table}.csv.gz')
+
+    with connection.cursor() as cursor:
+        columns = _columns(cursor, table)
+        cursor.execute(f'SELECT {", ".join(qn(c) for c in columns)} FROM {qn(table)} ORDER BY created_at')
+        with gzip.open(path, 'wt', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(columns)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.writerows(rows)
+    return path
+
+
+def drop_archive_month(month):
+    """Drop an archived month (detaches the partition first on PostgreSQL)."""
+    qn = connection.ops.quote_name
+    table = archive_table_name(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'ALTER TABLE {qn(ARCHIVE_TABLE)} DETACH PARTITION {qn(table)}')
+        cursor.execute(f'DROP TABLE IF EXISTS {qn(table)}')
+
+
+def parse_month(value):
+    """Parse 'YYYY-MM' into the first day of that month."""
+    year, month = value.split('-')
+    return date(int(year), int(month), 1)
@@ -0,0 +1,213 @@
+"""
+Rollup of raw product interactions into DailyProductStats / DailyCategoryStats.
+
+Each day is recomputed with one grouped query per table and written with a
+single ``INSERT ... ON CONFLICT DO UPDATE``, so re-running a day is idempotent.
+The incremental mode only revisits days that received interactions after the
+stored high-water mark on ``ProductInteraction.created_at``. Each day also
+gets HyperLogLog sketches of its distinct users and sessions (see
+``visitors``) so windows can count unique visitors without raw scans.
+
+Incremental runs hold a row lock on their RollupState, so a scheduled
+``rollup_analytics`` and request-triggered catch-ups never overlap.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .aggregates import COUNTERS, counter_aggregates, purchase_revenue, unique_visitors
+from .models import (
+    DailyCategoryStats, DailyProductStats, DailyVisitorStats, ProductInteraction, RollupState,
+)
+from .visitors import VisitorSketch
+
+ROLLUP_NAME = 'daily_stats'
+
+# High-water mark of this state is the point before which raw interactions
+# have been moved to the archive (see ``retention``).
+RETENTION_NAME = 'retention'
+
+STATS_FIELDS = list(COUNTERS) + ['revenue', 'unique_visitors']
+
+
+def day_bounds(start_day, end_day):
+    """Aware datetimes covering start_day 00:00 up to (not including) end_day + 1."""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_day, time.min), tz)
+    end = timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def _grouped_stats(start_day, end_day, group_field):
+    start, end = day_bounds(start_day, end_day)
+    return (
+        ProductInteraction.objects
+        .filter(created_at__gte=start, created_at__lt=end)
+        .annotate(date=TruncDate('created_at'))
+        .values(group_field, 'date')
+        .annotate(
+            **counter_aggregates(),
+            revenue=purchase_revenue(),
+            unique_visitors=unique_visitors(),
+        )
+        .order_by()
+    )
+
+
+def day_visitor_sketches(day):
+    """(users, sessions) sketches of the distinct visitors on ``day``."""
+    start, end = day_bounds(day, day)
+    interactions = ProductInteraction.objects.filter(created_at__gte=start, created_at__lt=end).order_by()
+    return (
+        VisitorSketch.of(interactions.filter(user__isnull=False).values_list('user_id', flat=True).distinct()),
+        VisitorSketch.of(interactions.filter(session_key__isnull=False).values_list('session_key', flat=True).distinct()),
+    )
+
+
+def rollup_day(day):
+    """Recompute and upsert product, category and visitor stats for a single day."""
+    product_rows = [
+        DailyProductStats(
+            product_id=row['product_id'],
+            date=row['date'],
+            **{field: row[field] for field in STATS_FIELDS},
+        )
+        for row in _grouped_stats(day, day, 'product_id')
+    ]
+    category_rows = [
+        DailyCategoryStats(
+            category_id=row['product__category_id'],
+            date=row['date'],
+            **{field: row[field] for field in STATS_FIELDS},
+        )
+        for row in _grouped_stats(day, day, 'product__category_id')
+    ]
+    users, sessions = day_visitor_sketches(day)
+
+    with transaction.atomic():
+        DailyProductStats.objects.bulk_create(
+            product_rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['product', 'date'],
+            update_fields=STATS_FIELDS,
+        )
+        DailyCategoryStats.objects.bulk_create(
+            category_rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['category', 'date'],
+            update_fields=STATS_FIELDS,
+        )
+        if product_rows:
+            DailyVisitorStats.objects.update_or_create(
+                date=day,
+                defaults={'user_sketch': users.to_bytes(), 'session_sketch': sessions.to_bytes()},
+            )
+
+    return len(product_rows), len(category_rows)
+
+
+def rollup_days(start_day, end_day):
+    """Recompute every day in [start_day, end_day]; returns the number of days."""
+    day = start_day
+    count = 0
+    while day <= end_day:
+        rollup_day(day)
+        day += timedelta(days=1)
+        count += 1
+    return count
+
+
+def get_rollup_state():
+    state, _ = RollupState.objects.get_or_create(name=ROLLUP_NAME)
+    return state
+
+
+def archived_before():
+    """Datetime before which raw interactions have been archived, if any."""
+    return RollupState.objects.filter(name=RETENTION_NAME).values_list(
+        'high_water_mark', flat=True
+    ).first()
+
+
+def run_incremental_rollup(now=None, max_days=None, wait=True):
+    """
+    Roll up every day touched by interactions newer than the high-water mark.
+
+    Interactions from the last ``ANALYTICS_ROLLUP_LAG_SECONDS`` are left for
+    the next run so rows from still-open transactions are not skipped. With
+    ``max_days`` only that many days (oldest first) are recomputed and
+    ``last_run_at`` is left alone until a later run catches up. With
+    ``wait=False`` the call returns None at once if another run holds the
+    lock. Returns the (first_day, last_day) range that was recomputed, or None.
+    """
+    now = now or timezone.now()
+    upper = now - timedelta(seconds=getattr(settings, 'ANALYTICS_ROLLUP_LAG_SECONDS', 60))
+    get_rollup_state()
+
+    with transaction.atomic():
+        state = RollupState.objects.select_for_update(skip_locked=not wait).filter(name=ROLLUP_NAME).first()
+        if state is None:
+            return None
+
+        pending = ProductInteraction.objects.filter(created_at__lte=upper)
+        if state.high_water_mark:
+            pending = pending.filter(created_at__gt=state.high_water_mark)
+        bounds = pending.aggregate(first=Min('created_at'), last=Max('created_at'))
+
+        if bounds['first'] is None:
+            state.last_run_at = now
+            state.save(update_fields=['last_run_at'])
+            return None
+
+        first_day = timezone.localdate(bounds['first'])
+        last_day = timezone.localdate(bounds['last'])
+        caught_up = not max_days or (last_day - first_day).days < max_days
+        if not caught_up:
+            last_day = first_day + timedelta(days=max_days - 1)
+            bounds = pending.filter(created_at__lt=day_bounds(last_day, last_day)[1]).aggregate(
+                last=Max('created_at')
+            )
+        rollup_days(first_day, last_day)
+
+        state.high_water_mark = bounds['last']
+        if caught_up:
+            state.last_run_at = now
+        state.save(update_fields=['high_water_mark', 'last_run_at'])
+    return first_day, last_day
+
+
+def rebuild_rollup(start_day=None, end_day=None):
+    """
+    Recompute a day range. Without a range every recorded day is rebuilt and
+    the high-water mark moves to the newest interaction; an explicit range
+    leaves the high-water mark untouched. Days whose raw interactions have
+    been archived are never recomputed.
+    """
+    bounds = ProductInteraction.objects.aggregate(first=Min('created_at'), last=Max('created_at'))
+    if bounds['first'] is None:
+        return None
+
+    full = start_day is None and end_day is None
+    start_day = start_day or timezone.localdate(bounds['first'])
+    end_day = end_day or timezone.localdate(bounds['last'])
+
+    archived = archived_before()
+    if archived is not None:
+        start_day = max(start_day, timezone.localdate(archived))
+    if start_day > end_day:
+        return None
+    rollup_days(start_day, end_day)
+
+    state = get_rollup_state()
+    if full:
+        state.high_water_mark = bounds['last']
+    state.last_run_at = timezone.now()
+    state.save()
+    return start_day, end_day
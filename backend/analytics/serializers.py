@@ -13,8 +13,8 @@ class ProductInteractionSerializer(serializers.ModelSerializer):
         model = ProductInteraction
         fields = [
             'id', 'product', 'product_name', 'user', 'user_email',
-            'session_key', 'interaction_type', 'metadata', 'ip_address',
-            'created_at'
+            'session_key', 'interaction_type', 'metadata', 'quantity',
+            'unit_price', 'order', 'ip_address', 'created_at'
         ]
 
 
@@ -42,7 +42,8 @@ class DailyCategoryStatsSerializer(serializers.ModelSerializer):
         model = DailyCategoryStats
         fields = [
             'id', 'category', 'category_name', 'date',
-            'views', 'clicks', 'add_to_cart', 'purchases', 'revenue'
+            'views', 'clicks', 'add_to_cart', 'remove_from_cart',
+            'purchases', 'revenue', 'unique_visitors'
         ]
 
 
@@ -117,3 +118,18 @@ class TrackInteractionSerializer(serializers.Serializer):
         'view', 'click', 'add_to_cart', 'remove_from_cart', 'purchase'
     ])
     metadata = serializers.DictField(required=False, default=dict)
+
+
+class TrackInteractionBatchSerializer(serializers.Serializer):
+    """Serializer for tracking many interactions in one request."""
+    
+    MAX_INTERACTIONS = 200
+    
+    interactions = TrackInteractionSerializer(many=True, allow_empty=False)
+    
+    def validate_interactions(self, value):
+        if len(value) > self.MAX_INTERACTIONS:
+            raise serializers.ValidationError(
+                f'At most {self.MAX_INTERACTIONS} interactions can be tracked per request.'
+            )
+        return value
@@ -0,0 +1,211 @@
+"""
+Read side of the daily stats tables.
+
+Windows are answered from DailyProductStats / DailyCategoryStats for every
+closed day and merged with today's partial day aggregated from raw
+interactions, so cost depends on the number of days and products, not on
+the number of raw events. Unique visitors are estimated by merging the
+per-day sketches in DailyVisitorStats with a sketch of today's visitors.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import DailyCategoryStats, DailyProductStats, DailyVisitorStats, ProductInteraction
+from .aggregates import COUNTERS, counter_aggregates, purchase_revenue
+from .rollup import archived_before, day_bounds, day_visitor_sketches, get_rollup_state, run_incremental_rollup
+
+# Per-day unique visitors cannot be summed across days, so windows only
+# expose the additive counters (see ``window_visitors`` for uniques).
+SUMMABLE_FIELDS = list(COUNTERS) + ['revenue']
+
+
+def ensure_rollup_fresh(now=None):
+    """
+    Catch up on closed days if no rollup has run since today started.
+
+    Off unless ``ANALYTICS_ROLLUP_ON_READ`` is set, since it makes GET
+    requests write: the scheduled ``rollup_analytics`` command keeps the
+    tables current. When enabled, the check is a single primary-key lookup,
+    at most ``ANALYTICS_ROLLUP_REQUEST_MAX_DAYS`` days are rolled up per
+    request, and requests that find another rollup in progress serve the
+    stats as they are.
+    """
+    if not getattr(settings, 'ANALYTICS_ROLLUP_ON_READ', False):
+        return
+    now = now or timezone.now()
+    today_start, _ = day_bounds(timezone.localdate(now), timezone.localdate(now))
+    lag = timedelta(seconds=getattr(settings, 'ANALYTICS_ROLLUP_LAG_SECONDS', 60))
+    state = get_rollup_state()
+    if state.last_run_at is None or state.last_run_at < today_start + lag:
+        run_incremental_rollup(
+            now,
+            max_days=getattr(settings, 'ANALYTICS_ROLLUP_REQUEST_MAX_DAYS', 3),
+            wait=False,
+        )
+
+
+def stats_window(days, now=None):
+    """Return (start_day, today) for a ``days``-long window ending now."""
+    now = now or timezone.now()
+    return timezone.localdate(now - timedelta(days=days)), timezone.localdate(now)
+
+
+def empty_stats():
+    stats = {field: 0 for field in COUNTERS}
+    stats['revenue'] = Decimal('0')
+    return stats
+
+
+def merge_stats(*rows):
+    """Add up counter/revenue dicts."""
+    merged = empty_stats()
+    for row in rows:
+        for field in SUMMABLE_FIELDS:
+            merged[field] += row.get(field) or 0
+    return merged
+
+
+def _summed():
+    return {field: Sum(field) for field in SUMMABLE_FIELDS}
+
+
+def _raw_aggregates():
+    return {**counter_aggregates(), 'revenue': purchase_revenue()}
+
+
+def _today_interactions(today, filters):
+    start, end = day_bounds(today, today)
+    return ProductInteraction.objects.filter(created_at__gte=start, created_at__lt=end, **filters)
+
+
+def _product_filters(category=None, product=None):
+    filters = {}
+    if category:
+        filters['product__category_id'] = category
+    if product:
+        filters['product_id'] = product
+    return filters
+
+
+def window_totals(days, category=None, product=None):
+    """Counter and revenue totals for the window."""
+    ensure_rollup_fresh()
+    start_day, today = stats_window(days)
+    filters = _product_filters(category, product)
+
+    closed = DailyProductStats.objects.filter(
+        date__gte=start_day, date__lt=today, **filters
+    ).aggregate(**_summed())
+    current = _today_interactions(today, filters).aggregate(**_raw_aggregates())
+    return merge_stats(closed, current)
+
+
+def daily_series(days, category=None, product=None):
+    """Per-day counters and revenue, oldest first; days without activity are omitted."""
+    ensure_rollup_fresh()
+    start_day, today = stats_window(days)
+    filters = _product_filters(category, product)
+
+    series = [
+        {'date': row['date'], **merge_stats(row)}
+        for row in DailyProductStats.objects.filter(
+            date__gte=start_day, date__lt=today, **filters
+        ).values('date').annotate(**_summed()).order_by('date')
+    ]
+
+    current = merge_stats(_today_interactions(today, filters).aggregate(**_raw_aggregates()))
+    if any(current[field] for field in COUNTERS):
+        series.append({'date': today, **current})
+    return series
+
+
+def window_visitors(days):
+    """Estimated (unique_users, unique_sessions) over the window."""
+    ensure_rollup_fresh()
+    start_day, today = stats_window(days)
+
+    users, sessions = day_visitor_sketches(today)
+    for user_sketch, session_sketch in DailyVisitorStats.objects.filter(
+        date__gte=start_day, date__lt=today
+    ).values_list('user_sketch', 'session_sketch'):
+        users.merge(user_sketch)
+        sessions.merge(session_sketch)
+    return users.count(), sessions.count()
+
+
+def category_totals(days):
+    """Counter and revenue totals per category id for the window."""
+    ensure_rollup_fresh()
+    start_day, today = stats_window(days)
+
+    totals = {}
+    for row in DailyCategoryStats.objects.filter(
+        date__gte=start_day, date__lt=today
+    ).values('category_id').annotate(**_summed()).order_by():
+        totals[row['category_id']] = merge_stats(row)
+
+    for row in _today_interactions(today, {}).values(
+        'product__category_id'
+    ).annotate(**_raw_aggregates()).order_by():
+        category_id = row['product__category_id']
+        totals[category_id] = merge_stats(totals.get(category_id, {}), row)
+
+    return totals
+
+
+def product_totals(days, category=None):
+    """Counter and revenue totals per product id for the window."""
+    ensure_rollup_fresh()
+    start_day, today = stats_window(days)
+    filters = _product_filters(category)
+
+    totals = {}
+    for row in DailyProductStats.objects.filter(
+        date__gte=start_day, date__lt=today, **filters
+    ).values('product_id').annotate(**_summed()).order_by():
+        totals[row['product_id']] = merge_stats(row)
+
+    for row in _today_interactions(today, filters).values(
+        'product_id'
+    ).annotate(**_raw_aggregates()).order_by():
+        product_id = row['product_id']
+        totals[product_id] = merge_stats(totals.get(product_id, {}), row)
+
+    return totals
+
+
+def estimated_interaction_count(days=None, category=None, product=None, interaction_type=None):
+    """
+    Approximate number of raw interactions matching the filters, from the
+    daily stats for closed days plus a count of today's rows.
+
+    Wishlist events are not rolled up: they are left out of unfiltered
+    estimates, and filtering on them returns None. Days are whole local days,
+    so a ``days`` window may be off by the part of its first day.
+    """
+    fields = [field for field, type_ in COUNTERS.items() if interaction_type in (None, type_)]
+    if not fields:
+        return None
+
+    ensure_rollup_fresh()
+    today = timezone.localdate()
+    filters = _product_filters(category, product)
+
+    closed = DailyProductStats.objects.filter(date__lt=today, **filters)
+    if days:
+        closed = closed.filter(date__gte=stats_window(days)[0])
+    # Stats outlive archived raw rows, which the history no longer lists
+    archived = archived_before()
+    if archived:
+        closed = closed.filter(date__gte=timezone.localdate(archived))
+    totals = closed.aggregate(**{field: Sum(field) for field in fields})
+
+    current = _today_interactions(today, filters).filter(
+        interaction_type__in=[COUNTERS[field] for field in fields]
+    ).count()
+    return sum(value or 0 for value in totals.values()) + current
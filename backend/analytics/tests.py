@@ -0,0 +1,119 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+
+from products.models import Category, Product
+from .ingestion import InteractionBuffer
+from .models import ProductInteraction, UserBehaviorSummary
+from .utils import build_interaction, track_interaction
+from .views import InteractionHistoryView
+
+User = get_user_model()
+
+
+class IngestionTestCase(TestCase):
+    
+    def setUp(self):
+        category = Category.objects.create(name='Books', slug='books')
+        self.product = Product.objects.create(
+            name='Novel', slug='novel', sku='BK-1', description='', price=100, stock=5, category=category,
+        )
+        self.request = RequestFactory().get('/')
+        self.request.user = User.objects.create_user(email='reader@example.com', username='reader', password='pass')
+    
+    def interaction(self, interaction_type='view'):
+        return build_interaction(self.request, self.product.pk, interaction_type)
+    
+    def summary(self):
+        return UserBehaviorSummary.objects.get(user=self.request.user, product=self.product)
+
+
+@override_settings(ANALYTICS_INGESTION={'MODE': 'sync'})
+class SyncIngestionTests(IngestionTestCase):
+    
+    def test_writes_the_interaction_and_its_summary_in_the_request(self):
+        track_interaction(self.request, self.product, 'view')
+        track_interaction(self.request, self.product, 'view')
+        track_interaction(self.request, self.product, 'add_to_cart')
+        
+        self.assertEqual(ProductInteraction.objects.filter(product=self.product).count(), 3)
+        summary = self.summary()
+        self.assertEqual((summary.view_count, summary.cart_add_count), (2, 1))
+        self.assertTrue(summary.added_to_cart)
+
+
+# The worker thread is kept out of these tests: batches are flushed explicitly
+@mock.patch.object(InteractionBuffer, '_ensure_worker')
+class InteractionBufferTests(IngestionTestCase):
+    
+    def buffer(self, overflow='write'):
+        return InteractionBuffer(max_queue_size=2, enqueue_timeout=0, overflow=overflow)
+    
+    def test_flush_keeps_the_time_each_event_was_tracked(self, ensure_worker):
+        buffer = self.buffer()
+        interaction = self.interaction()
+        tracked_at = interaction.created_at
+        self.assertTrue(buffer.submit(interaction))
+        self.assertFalse(ProductInteraction.objects.exists())
+        
+        # Flushed after midnight, the event still belongs to the day it happened
+        with mock.patch('django.utils.timezone.now', return_value=tracked_at + timedelta(days=1)):
+            buffer.flush()
+        
+        self.assertEqual(ProductInteraction.objects.get().created_at, tracked_at)
+        self.assertEqual(self.summary().last_view_at, tracked_at)
+    
+    def test_full_buffer_writes_overflow_in_the_caller(self, ensure_worker):
+        buffer = self.buffer(overflow='write')
+        results = [buffer.submit(self.interaction()) for _ in range(3)]
+        
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(ProductInteraction.objects.count(), 1)
+        buffer.flush()
+        self.assertEqual(ProductInteraction.objects.count(), 3)
+        self.assertEqual(self.summary().view_count, 3)
+    
+    def test_full_buffer_drops_overflow(self, ensure_worker):
+        buffer = self.buffer(overflow='drop')
+        with self.assertLogs('analytics.ingestion', 'WARNING'):
+            results = [buffer.submit(self.interaction()) for _ in range(3)]
+        
+        self.assertEqual(results, [True, True, False])
+        buffer.flush()
+        self.assertEqual(ProductInteraction.objects.count(), 2)
+    
+    @override_settings(ANALYTICS_INGESTION={'MODE': 'async'})
+    def test_async_mode_queues_events_once_the_request_commits(self, ensure_worker):
+        buffer = self.buffer()
+        with mock.patch('analytics.ingestion.get_interaction_buffer', return_value=buffer):
+            with self.captureOnCommitCallbacks(execute=True):
+                track_interaction(self.request, self.product, 'purchase', quantity=2)
+                self.assertEqual(buffer._queue.qsize(), 0)
+        
+        self.assertEqual(buffer._queue.qsize(), 1)
+        self.assertFalse(ProductInteraction.objects.exists())
+        buffer.flush()
+        self.assertEqual(ProductInteraction.objects.get().quantity, 2)
+
+
+class InteractionHistorySearchTests(IngestionTestCase):
+    
+    def test_keeps_every_matching_product_and_user(self):
+        lamps = Product.objects.bulk_create([
+            Product(
+                name=f'Desk Lamp {i}', slug=f'desk-lamp-{i}', sku=f'LP-{i}', description='',
+                price=10, stock=1, category=self.product.category,
+            )
+            for i in range(600)
+        ])
+        ProductInteraction.objects.bulk_create(
+            [ProductInteraction(product=lamp, interaction_type='view') for lamp in lamps]
+            + [ProductInteraction(product=self.product, user=self.request.user, interaction_type='view'),
+               ProductInteraction(product=self.product, interaction_type='view')]
+        )
+        search = InteractionHistoryView().search_interactions
+        
+        self.assertEqual(search(ProductInteraction.objects.all(), 'desk lamp').count(), 600)
+        self.assertEqual(search(ProductInteraction.objects.all(), 'reader@').count(), 1)
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     TrackInteractionView,
+    TrackInteractionBatchView,
     DashboardOverviewView,
     MostViewedProductsView,
     MostAddedToCartProductsView,
@@ -18,6 +19,7 @@ from .views import (
 urlpatterns = [
     # Public tracking endpoint
     path('track/', TrackInteractionView.as_view(), name='track-interaction'),
+    path('track/batch/', TrackInteractionBatchView.as_view(), name='track-interaction-batch'),
     
     # Admin analytics endpoints
     path('dashboard/', DashboardOverviewView.as_view(), name='dashboard-overview'),
@@ -1,5 +1,6 @@
 from django.utils import timezone
 from .models import ProductInteraction, UserBehaviorSummary
+from .ingestion import apply_behavior, ingest
 
 
 def get_client_ip(request):
@@ -19,37 +20,72 @@ def get_session_key(request):
     return request.session.session_key
 
 
-def track_interaction(request, product, interaction_type, metadata=None):
+def build_interaction(request, product_id, interaction_type, metadata=None,
+                      quantity=None, unit_price=None, order=None):
+    """Build an unsaved ProductInteraction carrying the request's visitor details."""
+    user = request.user if request.user.is_authenticated else None
+    session_key = get_session_key(request) if not user else None
+    
+    return ProductInteraction(
+        product_id=product_id,
+        user_id=user.pk if user else None,
+        session_key=session_key,
+        interaction_type=interaction_type,
+        metadata=metadata or {},
+        quantity=quantity,
+        unit_price=unit_price,
+        order_id=order.pk if order else None,
+        ip_address=get_client_ip(request),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        referrer=request.META.get('HTTP_REFERER'),
+        created_at=timezone.now(),
+    )
+
+
+def track_interaction(request, product, interaction_type, metadata=None,
+                      quantity=None, unit_price=None, order=None):
     """
     Track a product interaction.
     
+    Depending on ``ANALYTICS_INGESTION['MODE']`` the interaction is either
+    written immediately or queued for the background ingestion worker.
+    
     Args:
         request: Django request object
         product: Product instance
         interaction_type: One of 'view', 'click', 'add_to_cart', 'remove_from_cart', 'purchase'
         metadata: Optional dict with additional data
+        quantity: Units involved, for cart and purchase events
+        unit_price: Price paid per unit, for purchase events
+        order: Order instance, for purchase events
     """
-    user = request.user if request.user.is_authenticated else None
-    session_key = get_session_key(request) if not user else None
-    
-    # Create interaction record
-    interaction = ProductInteraction.objects.create(
-        product=product,
-        user=user,
-        session_key=session_key,
-        interaction_type=interaction_type,
-        metadata=metadata or {},
-        ip_address=get_client_ip(request),
-        user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        referrer=request.META.get('HTTP_REFERER')
+    interaction = build_interaction(
+        request, product.pk, interaction_type, metadata,
+        quantity=quantity, unit_price=unit_price, order=order
     )
     
-    # Update user behavior summary
-    update_user_behavior(user, session_key, product, interaction_type)
+    ingest([interaction])
     
     return interaction
 
 
+def track_interactions(request, events):
+    """
+    Track several interactions from one request with a single bulk write.
+    
+    Args:
+        request: Django request object
+        events: Iterable of (product_id, interaction_type, metadata) tuples,
+            optionally followed by a dict of quantity/unit_price/order
+    """
+    interactions = []
+    for product_id, interaction_type, metadata, *fields in events:
+        interactions.append(build_interaction(
+            request, product_id, interaction_type, metadata, **(fields[0] if fields else {})
+        ))
+    return ingest(interactions)
+
+
 def update_user_behavior(user, session_key, product, interaction_type):
     """Update user behavior summary for analytics."""
     
@@ -67,33 +103,5 @@ def update_user_behavior(user, session_key, product, interaction_type):
             user=None
         )
     
-    now = timezone.now()
-    
-    if interaction_type == 'view':
-        summary.viewed = True
-        summary.view_count += 1
-        if not summary.first_view_at:
-            summary.first_view_at = now
-        summary.last_view_at = now
-    
-    elif interaction_type == 'click':
-        summary.clicked = True
-    
-    elif interaction_type == 'add_to_cart':
-        summary.added_to_cart = True
-        summary.cart_add_count += 1
-        summary.added_to_cart_at = now
-        # Reset removed flag when added again
-        summary.removed_from_cart = False
-    
-    elif interaction_type == 'remove_from_cart':
-        summary.removed_from_cart = True
-        summary.cart_remove_count += 1
-        summary.removed_from_cart_at = now
-    
-    elif interaction_type == 'purchase':
-        summary.purchased = True
-        summary.purchase_count += 1
-        summary.purchased_at = now
-    
+    apply_behavior(summary, interaction_type, timezone.now())
     summary.save()
@@ -1,22 +1,34 @@
-from rest_framework import generics, permissions, status
+from rest_framework import filters, generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Sum, Count, F, Q, Avg
-from django.db.models.functions import TruncDate, Coalesce
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
 from datetime import timedelta
 import io
 import csv
 
 from .models import ProductInteraction, DailyProductStats, UserBehaviorSummary
 from .serializers import (
-    ProductInteractionSerializer, TrackInteractionSerializer,
+    ProductInteractionSerializer, TrackInteractionSerializer, TrackInteractionBatchSerializer,
     ProductAnalyticsSummarySerializer, CategoryAnalyticsSummarySerializer,
     TimeSeriesDataSerializer, FunnelDataSerializer
 )
-from .utils import track_interaction
+from .aggregates import counter_aggregates, purchase_revenue
+from .leaderboard import top_products
+from .stats import (
+    category_totals, daily_series, empty_stats, estimated_interaction_count, window_totals, window_visitors,
+)
+from .utils import track_interaction, track_interactions
+from django.contrib.auth import get_user_model
+from django_filters.rest_framework import DjangoFilterBackend
 from products.models import Product, Category
+from core.filters import indexed_search_lookup
+from core.pagination import KeysetPagination, estimate_table_rows
+
+User = get_user_model()
 
 
 class TrackInteractionView(APIView):
@@ -40,6 +52,34 @@ class TrackInteractionView(APIView):
         return Response({'message': 'Interaction tracked successfully'})
 
 
+class TrackInteractionBatchView(APIView):
+    """Track many product interactions from the frontend in one request."""
+    
+    permission_classes = [permissions.AllowAny]
+    
+    def post(self, request):
+        serializer = TrackInteractionBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        events = serializer.validated_data['interactions']
+        
+        # Resolve every referenced product in one query; unknown IDs are skipped
+        existing_ids = set(Product.objects.filter(
+            id__in={event['product_id'] for event in events}
+        ).values_list('id', flat=True))
+        
+        tracked = track_interactions(request, [
+            (event['product_id'], event['interaction_type'], event.get('metadata', {}))
+            for event in events
+            if event['product_id'] in existing_ids
+        ])
+        
+        return Response({
+            'message': 'Interactions tracked successfully',
+            'tracked': len(tracked),
+            'skipped': len(events) - len(tracked),
+        })
+
+
 class IsAdminOrStaff(permissions.BasePermission):
     """Permission check for admin/staff users."""
     
@@ -58,27 +98,17 @@ class DashboardOverviewView(APIView):
     def get(self, request):
         # Date range from query params
         days = int(request.query_params.get('days', 30))
-        start_date = timezone.now() - timedelta(days=days)
-        
-        # Get interactions in date range
-        interactions = ProductInteraction.objects.filter(created_at__gte=start_date)
-        
-        # Overview stats
-        total_views = interactions.filter(interaction_type='view').count()
-        total_add_to_cart = interactions.filter(interaction_type='add_to_cart').count()
-        total_purchases = interactions.filter(interaction_type='purchase').count()
-        total_remove_from_cart = interactions.filter(interaction_type='remove_from_cart').count()
         
-        # Revenue calculation
-        purchase_interactions = interactions.filter(interaction_type='purchase')
-        total_revenue = 0
-        for interaction in purchase_interactions:
-            quantity = interaction.metadata.get('quantity', 1)
-            total_revenue += float(interaction.product.final_price) * quantity
+        # Counters and revenue come from the daily stats tables (plus today's raw events)
+        totals = window_totals(days)
+        total_views = totals['views']
+        total_add_to_cart = totals['add_to_cart']
+        total_purchases = totals['purchases']
+        total_remove_from_cart = totals['remove_from_cart']
+        total_revenue = float(totals['revenue'])
         
-        # Unique users/sessions
-        unique_users = interactions.exclude(user__isnull=True).values('user').distinct().count()
-        unique_sessions = interactions.exclude(session_key__isnull=True).values('session_key').distinct().count()
+        # Unique users/sessions are estimated by merging per-day visitor sketches
+        unique_users, unique_sessions = window_visitors(days)
         
         # Conversion rates
         view_to_cart_rate = (total_add_to_cart / total_views * 100) if total_views > 0 else 0
@@ -106,143 +136,58 @@ class DashboardOverviewView(APIView):
         })
 
 
-class MostViewedProductsView(APIView):
-    """Get most viewed products."""
+class TopProductsView(APIView):
+    """Base for the top-products reports, ranked from the cached leaderboard."""
     
     permission_classes = [IsAdminOrStaff]
+    metric = None
+    total_field = None
     
     def get(self, request):
         days = int(request.query_params.get('days', 30))
         limit = int(request.query_params.get('limit', 10))
         category = request.query_params.get('category')
         
-        start_date = timezone.now() - timedelta(days=days)
-        
-        queryset = ProductInteraction.objects.filter(
-            interaction_type='view',
-            created_at__gte=start_date
-        )
-        
-        if category:
-            queryset = queryset.filter(product__category_id=category)
-        
-        products = queryset.values(
-            'product__id',
-            'product__name',
-            'product__image',
-            'product__category__name'
-        ).annotate(
-            total_views=Count('id')
-        ).order_by('-total_views')[:limit]
-        
         result = []
-        for item in products:
-            result.append({
-                'product_id': item['product__id'],
-                'product_name': item['product__name'],
-                'product_image': item['product__image'],
-                'category_name': item['product__category__name'],
-                'total_views': item['total_views'],
-            })
+        for item in top_products(self.metric, days, limit, category):
+            result.append(self.serialize(item))
         
         return Response(result)
+    
+    def serialize(self, item):
+        return {
+            'product_id': item['product_id'],
+            'product_name': item['product_name'],
+            'product_image': item['product_image'],
+            'category_name': item['category_name'],
+            self.total_field: item[self.metric],
+        }
 
 
-class MostAddedToCartProductsView(APIView):
-    """Get products most frequently added to cart."""
+class MostViewedProductsView(TopProductsView):
+    """Get most viewed products."""
     
-    permission_classes = [IsAdminOrStaff]
+    metric = 'views'
+    total_field = 'total_views'
+
+
+class MostAddedToCartProductsView(TopProductsView):
+    """Get products most frequently added to cart."""
     
-    def get(self, request):
-        days = int(request.query_params.get('days', 30))
-        limit = int(request.query_params.get('limit', 10))
-        category = request.query_params.get('category')
-        
-        start_date = timezone.now() - timedelta(days=days)
-        
-        queryset = ProductInteraction.objects.filter(
-            interaction_type='add_to_cart',
-            created_at__gte=start_date
-        )
-        
-        if category:
-            queryset = queryset.filter(product__category_id=category)
-        
-        products = queryset.values(
-            'product__id',
-            'product__name',
-            'product__image',
-            'product__category__name'
-        ).annotate(
-            total_adds=Count('id')
-        ).order_by('-total_adds')[:limit]
-        
-        result = []
-        for item in products:
-            result.append({
-                'product_id': item['product__id'],
-                'product_name': item['product__name'],
-                'product_image': item['product__image'],
-                'category_name': item['product__category__name'],
-                'total_adds': item['total_adds'],
-            })
-        
-        return Response(result)
+    metric = 'add_to_cart'
+    total_field = 'total_adds'
 
 
-class MostPurchasedProductsView(APIView):
+class MostPurchasedProductsView(TopProductsView):
     """Get most purchased products."""
     
-    permission_classes = [IsAdminOrStaff]
+    metric = 'purchases'
+    total_field = 'total_purchases'
     
-    def get(self, request):
-        days = int(request.query_params.get('days', 30))
-        limit = int(request.query_params.get('limit', 10))
-        category = request.query_params.get('category')
-        
-        start_date = timezone.now() - timedelta(days=days)
-        
-        queryset = ProductInteraction.objects.filter(
-            interaction_type='purchase',
-            created_at__gte=start_date
-        )
-        
-        if category:
-            queryset = queryset.filter(product__category_id=category)
-        
-        products = queryset.values(
-            'product__id',
-            'product__name',
-            'product__image',
-            'product__category__name',
-            'product__price'
-        ).annotate(
-            total_purchases=Count('id')
-        ).order_by('-total_purchases')[:limit]
-        
-        result = []
-        for item in products:
-            # Calculate revenue
-            purchases = ProductInteraction.objects.filter(
-                product_id=item['product__id'],
-                interaction_type='purchase',
-                created_at__gte=start_date
-            )
-            revenue = sum(
-                float(item['product__price']) * p.metadata.get('quantity', 1)
-                for p in purchases
-            )
-            
-            result.append({
-                'product_id': item['product__id'],
-                'product_name': item['product__name'],
-                'product_image': item['product__image'],
-                'category_name': item['product__category__name'],
-                'total_purchases': item['total_purchases'],
-                'total_revenue': round(revenue, 2),
-            })
-        
-        return Response(result)
+    def serialize(self, item):
+        data = super().serialize(item)
+        data['total_revenue'] = round(float(item['revenue']), 2)
+        return data
 
 
 class ViewedButNotPurchasedView(APIView):
@@ -331,42 +276,14 @@ class TimeSeriesAnalyticsView(APIView):
         category = request.query_params.get('category')
         product_id = request.query_params.get('product')
         
-        start_date = timezone.now() - timedelta(days=days)
-        
-        queryset = ProductInteraction.objects.filter(created_at__gte=start_date)
-        
-        if category:
-            queryset = queryset.filter(product__category_id=category)
-        if product_id:
-            queryset = queryset.filter(product_id=product_id)
-        
-        # Group by date
-        data = queryset.annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            views=Count('id', filter=Q(interaction_type='view')),
-            add_to_cart=Count('id', filter=Q(interaction_type='add_to_cart')),
-            purchases=Count('id', filter=Q(interaction_type='purchase')),
-        ).order_by('date')
-        
         result = []
-        for item in data:
-            # Calculate revenue for this date
-            date_purchases = queryset.filter(
-                interaction_type='purchase',
-                created_at__date=item['date']
-            )
-            revenue = sum(
-                float(p.product.final_price) * p.metadata.get('quantity', 1)
-                for p in date_purchases
-            )
-            
+        for item in daily_series(days, category=category, product=product_id):
             result.append({
                 'date': item['date'].isoformat(),
                 'views': item['views'],
                 'add_to_cart': item['add_to_cart'],
                 'purchases': item['purchases'],
-                'revenue': round(revenue, 2),
+                'revenue': round(float(item['revenue']), 2),
             })
         
         return Response(result)
@@ -379,36 +296,22 @@ class CategoryAnalyticsView(APIView):
     
     def get(self, request):
         days = int(request.query_params.get('days', 30))
-        start_date = timezone.now() - timedelta(days=days)
-        
-        categories = Category.objects.filter(is_active=True)
+        totals = category_totals(days)
+        categories = Category.objects.filter(is_active=True).annotate(
+            active_products=Count('products', filter=Q(products__is_active=True))
+        )
         
         result = []
         for category in categories:
-            interactions = ProductInteraction.objects.filter(
-                product__category=category,
-                created_at__gte=start_date
-            )
-            
-            views = interactions.filter(interaction_type='view').count()
-            add_to_cart = interactions.filter(interaction_type='add_to_cart').count()
-            purchases = interactions.filter(interaction_type='purchase').count()
-            
-            # Calculate revenue
-            purchase_interactions = interactions.filter(interaction_type='purchase')
-            revenue = sum(
-                float(p.product.final_price) * p.metadata.get('quantity', 1)
-                for p in purchase_interactions
-            )
-            
+            stats = totals.get(category.id) or empty_stats()
             result.append({
                 'category_id': str(category.id),
                 'category_name': category.name,
-                'total_views': views,
-                'total_add_to_cart': add_to_cart,
-                'total_purchases': purchases,
-                'total_revenue': round(revenue, 2),
-                'product_count': category.products.filter(is_active=True).count(),
+                'total_views': stats['views'],
+                'total_add_to_cart': stats['add_to_cart'],
+                'total_purchases': stats['purchases'],
+                'total_revenue': round(float(stats['revenue']), 2),
+                'product_count': category.active_products,
             })
         
         return Response(sorted(result, key=lambda x: x['total_views'], reverse=True))
@@ -468,14 +371,22 @@ class FunnelAnalyticsView(APIView):
 
 
 class InteractionHistoryView(generics.ListAPIView):
-    """Get complete interaction history."""
+    """
+    Get complete interaction history, paginated by (created_at, id) cursors.
+    
+    ``?count=estimate`` adds an approximate total from planner statistics or
+    the daily stats, so no request ever counts the raw table.
+    """
     
     serializer_class = ProductInteractionSerializer
     permission_classes = [IsAdminOrStaff]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['interaction_type', 'product']
-    search_fields = ['product__name', 'user__email']
     ordering_fields = ['created_at']
     ordering = ['-created_at']
+    # Matching products/users are looked up in subqueries (see search_interactions)
+    search_param = 'search'
     
     def get_queryset(self):
         queryset = ProductInteraction.objects.select_related('product', 'user')
@@ -491,115 +402,180 @@ class InteractionHistoryView(generics.ListAPIView):
         if category:
             queryset = queryset.filter(product__category_id=category)
         
+        search = self.request.query_params.get(self.search_param, '').strip()
+        if search:
+            queryset = self.search_interactions(queryset, search)
+        
         return queryset
+    
+    def search_interactions(self, queryset, search):
+        """
+        Restrict to interactions of products whose name, or users whose email,
+        matches ``search``.
+        
+        The lookups run as ``IN`` subqueries against the small products and
+        users tables, where they can use an index, and the interactions are
+        then fetched through their product and user indexes instead of joining
+        and scanning every event. Every match is kept, however many there are.
+        """
+        lookup = indexed_search_lookup(queryset)
+        products = Product.objects.filter(**{f'name__{lookup}': search}).order_by().values('id')
+        users = User.objects.filter(**{f'email__{lookup}': search}).order_by().values('id')
+        return queryset.filter(Q(product_id__in=products) | Q(user_id__in=users))
+    
+    def estimate_count(self, queryset):
+        """Approximate size of the listed history, or None if it cannot be estimated cheaply."""
+        params = self.request.query_params
+        if params.get(self.search_param):
+            return None
+        
+        criteria = {
+            'days': int(params['days']) if params.get('days') else None,
+            'category': params.get('category') or None,
+            'product': params.get('product') or None,
+            'interaction_type': params.get('interaction_type') or None,
+        }
+        if not any(criteria.values()):
+            estimate = estimate_table_rows(ProductInteraction, queryset.db)
+            if estimate is not None:
+                return estimate
+        return estimated_interaction_count(**criteria)
+
+
+class Echo:
+    """Pseudo-buffer that hands back whatever csv.writer writes to it."""
+    
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    """Yield CSV-encoded lines for a header and an iterable of rows."""
+    writer = csv.writer(Echo())
+    if header:
+        yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
 
 
 class ExportAnalyticsView(APIView):
-    """Export analytics data as CSV."""
+    """Export analytics data as CSV, streamed row by row."""
     
     permission_classes = [IsAdminOrStaff]
+    chunk_size = 2000
     
     def get(self, request):
         report_type = request.query_params.get('type', 'interactions')
         days = int(request.query_params.get('days', 30))
         start_date = timezone.now() - timedelta(days=days)
         
-        from django.http import HttpResponse
-        
-        response = HttpResponse(content_type='text/csv')
+        reports = {
+            'interactions': self.interaction_rows,
+            'products': self.product_rows,
+            'categories': self.category_rows,
+        }
+        if report_type in reports:
+            header, rows = reports[report_type](start_date)
+        else:
+            header, rows = [], []
+        
+        response = StreamingHttpResponse(stream_csv(header, rows), content_type='text/csv')
         response['Content-Disposition'] = f'attachment; filename="{report_type}_report.csv"'
+        return response
+    
+    def interaction_rows(self, start_date):
+        header = [
+            'Date', 'Product', 'Category', 'Interaction Type',
+            'User Email', 'Session Key', 'IP Address'
+        ]
         
-        writer = csv.writer(response)
+        # values_list + iterator() reads through a server-side cursor where the
+        # database supports it, so memory stays flat regardless of the window
+        interactions = ProductInteraction.objects.filter(
+            created_at__gte=start_date
+        ).values_list(
+            'created_at', 'product__name', 'product__category__name',
+            'interaction_type', 'user__email', 'session_key', 'ip_address'
+        ).iterator(chunk_size=self.chunk_size)
+        
+        rows = (
+            [
+                created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                product_name,
+                category_name,
+                interaction_type,
+                email or 'Anonymous',
+                session_key or '',
+                ip_address or '',
+            ]
+            for created_at, product_name, category_name, interaction_type, email, session_key, ip_address
+            in interactions
+        )
+        return header, rows
+    
+    def product_rows(self, start_date):
+        header = [
+            'Product', 'Category', 'Views', 'Add to Cart',
+            'Remove from Cart', 'Purchases', 'Revenue'
+        ]
         
-        if report_type == 'interactions':
-            writer.writerow([
-                'Date', 'Product', 'Category', 'Interaction Type',
-                'User Email', 'Session Key', 'IP Address'
-            ])
-            
-            interactions = ProductInteraction.objects.filter(
-                created_at__gte=start_date
-            ).select_related('product', 'product__category', 'user')
-            
-            for i in interactions:
-                writer.writerow([
-                    i.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                    i.product.name,
-                    i.product.category.name,
-                    i.interaction_type,
-                    i.user.email if i.user else 'Anonymous',
-                    i.session_key or '',
-                    i.ip_address or '',
-                ])
-        
-        elif report_type == 'products':
-            writer.writerow([
-                'Product', 'Category', 'Views', 'Add to Cart',
-                'Remove from Cart', 'Purchases', 'Revenue'
-            ])
-            
-            products = Product.objects.filter(is_active=True).select_related('category')
-            
-            for product in products:
-                interactions = ProductInteraction.objects.filter(
-                    product=product,
+        def rows():
+            stats = {
+                row['product_id']: row
+                for row in ProductInteraction.objects.filter(
                     created_at__gte=start_date
-                )
-                
-                views = interactions.filter(interaction_type='view').count()
-                add_to_cart = interactions.filter(interaction_type='add_to_cart').count()
-                remove_from_cart = interactions.filter(interaction_type='remove_from_cart').count()
-                purchases = interactions.filter(interaction_type='purchase').count()
-                
-                purchase_interactions = interactions.filter(interaction_type='purchase')
-                revenue = sum(
-                    float(product.final_price) * p.metadata.get('quantity', 1)
-                    for p in purchase_interactions
-                )
-                
-                writer.writerow([
-                    product.name,
-                    product.category.name,
-                    views,
-                    add_to_cart,
-                    remove_from_cart,
-                    purchases,
-                    round(revenue, 2),
-                ])
-        
-        elif report_type == 'categories':
-            writer.writerow([
-                'Category', 'Products', 'Views', 'Add to Cart', 'Purchases', 'Revenue'
-            ])
+                ).values('product_id').annotate(
+                    **counter_aggregates(),
+                    revenue=purchase_revenue()
+                ).order_by()
+            }
             
-            categories = Category.objects.filter(is_active=True)
+            products = Product.objects.filter(is_active=True).values_list(
+                'id', 'name', 'category__name'
+            ).iterator(chunk_size=self.chunk_size)
             
-            for category in categories:
-                interactions = ProductInteraction.objects.filter(
-                    product__category=category,
+            for product_id, name, category_name in products:
+                row = stats.get(product_id, {})
+                yield [
+                    name,
+                    category_name,
+                    row.get('views', 0),
+                    row.get('add_to_cart', 0),
+                    row.get('remove_from_cart', 0),
+                    row.get('purchases', 0),
+                    round(float(row.get('revenue', 0)), 2),
+                ]
+        
+        return header, rows()
+    
+    def category_rows(self, start_date):
+        header = [
+            'Category', 'Products', 'Views', 'Add to Cart', 'Purchases', 'Revenue'
+        ]
+        
+        def rows():
+            stats = {
+                row['product__category_id']: row
+                for row in ProductInteraction.objects.filter(
                     created_at__gte=start_date
-                )
-                
-                views = interactions.filter(interaction_type='view').count()
-                add_to_cart = interactions.filter(interaction_type='add_to_cart').count()
-                purchases = interactions.filter(interaction_type='purchase').count()
-                
-                purchase_interactions = interactions.filter(interaction_type='purchase')
-                revenue = sum(
-                    float(p.product.final_price) * p.metadata.get('quantity', 1)
-                    for p in purchase_interactions
-                )
-                
-                writer.writerow([
+                ).values('product__category_id').annotate(
+                    **counter_aggregates(),
+                    revenue=purchase_revenue()
+                ).order_by()
+            }
+            
+            for category in Category.objects.filter(is_active=True).with_product_count():
+                row = stats.get(category.id, {})
+                yield [
                     category.name,
-                    category.products.filter(is_active=True).count(),
-                    views,
-                    add_to_cart,
-                    purchases,
-                    round(revenue, 2),
-                ])
-        
-        return response
+                    category.active_product_count,
+                    row.get('views', 0),
+                    row.get('add_to_cart', 0),
+                    row.get('purchases', 0),
+                    round(float(row.get('revenue', 0)), 2),
+                ]
+        
+        return header, rows()
 
 
 class ExportPDFView(APIView):
@@ -4,6 +4,18 @@ from products.models import Product
 import uuid
 
 
+class CartQuerySet(models.QuerySet):
+    
+    def with_items(self):
+        """Prefetch items with their products and categories for serialization."""
+        return self.prefetch_related(
+            models.Prefetch(
+                'items',
+                queryset=CartItem.objects.select_related('product__category').order_by('added_at')
+            )
+        )
+
+
 class Cart(models.Model):
     """Shopping cart model."""
     
@@ -19,6 +31,8 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CartQuerySet.as_manager()
+    
     class Meta:
         db_table = 'carts'
         verbose_name = 'Cart'
@@ -29,13 +43,22 @@ class Cart(models.Model):
             return f"Cart for {self.user.email}"
         return f"Anonymous Cart ({self.session_key[:8]}...)"
     
+    def get_totals(self):
+        """Return (total_items, subtotal) in one pass over the items."""
+        total_items = 0
+        subtotal = 0
+        for item in self.items.all():
+            total_items += item.quantity
+            subtotal += item.total_price
+        return total_items, subtotal
+    
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.get_totals()[0]
     
     @property
     def subtotal(self):
-        return sum(item.total_price for item in self.items.all())
+        return self.get_totals()[1]
     
     @property
     def total(self):
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from analytics.models import ProductInteraction
+from products.models import Category, Product
+from .models import Cart, CartItem
+
+User = get_user_model()
+
+
+class CartQueryCountTests(TestCase):
+    """Cart endpoints must not issue queries per cart item."""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(email='shopper@example.com', username='shopper', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+        # The first request creates the session; keep that out of the counts
+        self.client.get('/api/cart/')
+    
+    def add_items(self, count):
+        start = Product.objects.count()
+        for i in range(start, start + count):
+            category = Category.objects.create(name=f'Category {i}', slug=f'category-{i}')
+            product = Product.objects.create(
+                name=f'Product {i}', slug=f'product-{i}', sku=f'SKU-{i}', description='',
+                price=10, discount_price=8 if i % 2 else None, stock=5, category=category,
+            )
+            CartItem.objects.create(cart=self.cart, product=product, quantity=1)
+    
+    def get_cart(self):
+        response = self.client.get('/api/cart/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def test_query_count_does_not_grow_with_items(self):
+        self.add_items(1)
+        with CaptureQueriesContext(connection) as single:
+            data = self.get_cart()
+        self.assertEqual(len(data['items']), 1)
+        
+        self.add_items(19)
+        with self.assertNumQueries(len(single)):
+            data = self.get_cart()
+        self.assertEqual(len(data['items']), 20)
+    
+    @override_settings(ANALYTICS_INGESTION={'MODE': 'sync'})
+    def test_clearing_tracks_every_item_without_queries_per_item(self):
+        self.add_items(1)
+        with CaptureQueriesContext(connection) as single:
+            self.assertEqual(self.client.delete('/api/cart/clear/').status_code, 200)
+        
+        self.add_items(20)
+        with self.assertNumQueries(len(single)):
+            data = self.client.delete('/api/cart/clear/').data
+        self.assertEqual(data['items'], [])
+        removals = ProductInteraction.objects.filter(interaction_type='remove_from_cart')
+        self.assertEqual(removals.count(), 21)
+        self.assertTrue(all(r.metadata['cart_cleared'] for r in removals))
@@ -5,22 +5,28 @@ from django.shortcuts import get_object_or_404
 from .models import Cart, CartItem
 from .serializers import CartSerializer, AddToCartSerializer, UpdateCartItemSerializer
 from products.models import Product
-from analytics.utils import track_interaction
+from analytics.utils import track_interaction, track_interactions
 
 
 class CartMixin:
     """Mixin to get or create cart for user or session."""
     
-    def get_cart(self, request):
+    def get_cart(self, request, with_items=False):
+        queryset = Cart.objects.with_items() if with_items else Cart.objects.all()
         if request.user.is_authenticated:
-            cart, created = Cart.objects.get_or_create(user=request.user)
+            cart, created = queryset.get_or_create(user=request.user)
         else:
             session_key = request.session.session_key
             if not session_key:
                 request.session.create()
                 session_key = request.session.session_key
-            cart, created = Cart.objects.get_or_create(session_key=session_key)
+            cart, created = queryset.get_or_create(session_key=session_key)
         return cart
+    
+    def cart_data(self, cart):
+        """Serialize the cart, reloading its items, products and categories in one go."""
+        cart = Cart.objects.with_items().get(pk=cart.pk)
+        return CartSerializer(cart).data
 
 
 class CartView(CartMixin, APIView):
@@ -29,7 +35,7 @@ class CartView(CartMixin, APIView):
     permission_classes = [permissions.AllowAny]
     
     def get(self, request):
-        cart = self.get_cart(request)
+        cart = self.get_cart(request, with_items=True)
         serializer = CartSerializer(cart)
         return Response(serializer.data)
 
@@ -75,10 +81,11 @@ class AddToCartView(CartMixin, APIView):
             request=request,
             product=product,
             interaction_type='add_to_cart',
-            metadata={'quantity': quantity}
+            metadata={'quantity': quantity},
+            quantity=quantity
         )
         
-        return Response(CartSerializer(cart).data, status=status.HTTP_201_CREATED)
+        return Response(self.cart_data(cart), status=status.HTTP_201_CREATED)
 
 
 class UpdateCartItemView(CartMixin, APIView):
@@ -91,7 +98,7 @@ class UpdateCartItemView(CartMixin, APIView):
         serializer.is_valid(raise_exception=True)
         
         cart = self.get_cart(request)
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+        cart_item = get_object_or_404(CartItem.objects.select_related('product'), id=item_id, cart=cart)
         
         quantity = serializer.validated_data['quantity']
         
@@ -104,7 +111,7 @@ class UpdateCartItemView(CartMixin, APIView):
         cart_item.quantity = quantity
         cart_item.save()
         
-        return Response(CartSerializer(cart).data)
+        return Response(self.cart_data(cart))
 
 
 class RemoveFromCartView(CartMixin, APIView):
@@ -114,7 +121,7 @@ class RemoveFromCartView(CartMixin, APIView):
     
     def delete(self, request, item_id):
         cart = self.get_cart(request)
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+        cart_item = get_object_or_404(CartItem.objects.select_related('product'), id=item_id, cart=cart)
         product = cart_item.product
         
         # Track interaction
@@ -122,12 +129,13 @@ class RemoveFromCartView(CartMixin, APIView):
             request=request,
             product=product,
             interaction_type='remove_from_cart',
-            metadata={'quantity': cart_item.quantity}
+            metadata={'quantity': cart_item.quantity},
+            quantity=cart_item.quantity
         )
         
         cart_item.delete()
         
-        return Response(CartSerializer(cart).data)
+        return Response(self.cart_data(cart))
 
 
 class ClearCartView(CartMixin, APIView):
@@ -138,18 +146,20 @@ class ClearCartView(CartMixin, APIView):
     def delete(self, request):
         cart = self.get_cart(request)
         
-        # Track removal for all items
-        for item in cart.items.all():
-            track_interaction(
-                request=request,
-                product=item.product,
-                interaction_type='remove_from_cart',
-                metadata={'quantity': item.quantity, 'cart_cleared': True}
+        # Track removal for all items in one bulk write
+        track_interactions(request, [
+            (
+                product_id,
+                'remove_from_cart',
+                {'quantity': quantity, 'cart_cleared': True},
+                {'quantity': quantity}
             )
+            for product_id, quantity in cart.items.values_list('product_id', 'quantity')
+        ])
         
         cart.items.all().delete()
         
-        return Response(CartSerializer(cart).data)
+        return Response(self.cart_data(cart))
 
 
 class MergeCartView(CartMixin, APIView):
@@ -173,7 +183,7 @@ class MergeCartView(CartMixin, APIView):
         for item in anonymous_cart.items.all():
             user_item, created = CartItem.objects.get_or_create(
                 cart=user_cart,
-                product=item.product,
+                product_id=item.product_id,
                 defaults={'quantity': item.quantity}
             )
             if not created:
@@ -183,4 +193,4 @@ class MergeCartView(CartMixin, APIView):
         # Delete anonymous cart
         anonymous_cart.delete()
         
-        return Response(CartSerializer(user_cart).data)
+        return Response(self.cart_data(user_cart))
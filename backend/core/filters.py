@@ -0,0 +1,27 @@
+from django.db import connections
+from rest_framework.filters import SearchFilter
+
+
+def indexed_search_lookup(queryset):
+    """
+    The case-insensitive text lookup an index can serve on this database.
+
+    PostgreSQL keeps substring matching (``icontains``), which trigram GIN
+    indexes on ``UPPER(column::text)`` accelerate. Other databases match on
+    prefixes (``istartswith``), which SQLite answers from ``COLLATE NOCASE``
+    indexes instead of scanning the table.
+    """
+    return 'icontains' if connections[queryset.db].vendor == 'postgresql' else 'istartswith'
+
+
+class IndexedSearchFilter(SearchFilter):
+    """
+    SearchFilter whose default lookup can be served by an index (see
+    ``indexed_search_lookup``). Fields with an explicit prefix (``^``, ``=``,
+    ``@``, ``$``) keep DRF's behaviour.
+    """
+    
+    def construct_search(self, field_name, queryset):
+        if field_name[0] in self.lookup_prefixes:
+            return super().construct_search(field_name, queryset)
+        return f'{field_name}__{indexed_search_lookup(queryset)}'
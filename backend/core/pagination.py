@@ -0,0 +1,211 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are addressed by the ``(created_at, pk)`` of the row they start after
+rather than by an OFFSET, so each page is a bounded range scan of an index on
+those columns and a deep page costs the same as the first one.
+
+No exact total is ever counted. Views can offer an approximate one by
+defining ``estimate_count(queryset)``, returned when the client asks for it
+with ``?count=estimate``.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import namedtuple
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+Cursor = namedtuple('Cursor', ['value', 'pk', 'reverse'])
+
+NOT_REQUESTED = object()
+
+
+def estimate_table_rows(model, using='default'):
+    """
+    Row count of a model's table from planner statistics, or None where the
+    database keeps none (anything but PostgreSQL, or a never-analyzed table).
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate on ``(ordering_field, pk)``, newest first unless the queryset is
+    ordered by ``ordering_field`` ascending (e.g. via ``?ordering=created_at``).
+    
+    Responses carry ``next``/``previous`` links; ``count`` is only included,
+    as an estimate, when requested and the view can provide one.
+    """
+    
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+    ordering_field = 'created_at'
+    invalid_cursor_message = 'Invalid cursor'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_count_estimate(queryset, request, view)
+        
+        cursor = self.decode_cursor(request, queryset.model)
+        backwards = bool(cursor and cursor.reverse)
+        # Walking back from a page scans the index in the opposite direction
+        descending = self.is_descending(queryset) != backwards
+        
+        field = self.ordering_field
+        if cursor:
+            op = 'lt' if descending else 'gt'
+            # The redundant inclusive bound gives the planner a plain range on the index
+            queryset = queryset.filter(**{f'{field}__{op}e': cursor.value}).filter(
+                Q(**{f'{field}__{op}': cursor.value}) | Q(**{field: cursor.value, f'pk__{op}': cursor.pk})
+            )
+        prefix = '-' if descending else ''
+        results = list(queryset.order_by(f'{prefix}{field}', f'{prefix}pk')[:self.page_size + 1])
+        
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if backwards:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        
+        self.page = results
+        return results
+    
+    def is_descending(self, queryset):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        if not ordering:
+            return True
+        first = ordering[0]
+        if isinstance(first, str):
+            return first.startswith('-')
+        return getattr(first, 'descending', True)
+    
+    def get_count_estimate(self, queryset, request, view):
+        """The view's ``estimate_count(queryset)`` if the client asked for it, else ``NOT_REQUESTED``."""
+        if request.query_params.get(self.count_query_param) != 'estimate':
+            return NOT_REQUESTED
+        estimate = getattr(view, 'estimate_count', None)
+        return estimate(queryset) if estimate else None
+    
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+    
+    def decode_cursor(self, request, model):
+        """The request's cursor with its values converted by the model's fields; None if absent."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            value = model._meta.get_field(self.ordering_field).to_python(data['v'])
+            pk = model._meta.pk.to_python(data['k'])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None or pk is None:
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(value=value, pk=pk, reverse=bool(data.get('r')))
+    
+    def encode_cursor(self, instance, reverse):
+        value = getattr(instance, self.ordering_field)
+        data = {
+            'v': value.isoformat() if hasattr(value, 'isoformat') else value,
+            'k': str(instance.pk),
+        }
+        if reverse:
+            data['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+    
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+    
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+    
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not NOT_REQUESTED:
+            response = {'count': self.count, 'count_is_estimate': True, **response}
+        return Response(response)
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'count_is_estimate': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+    
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Pass "estimate" to include an approximate total count.',
+                'schema': {'type': 'string', 'enum': ['estimate']},
+            },
+        ]
@@ -0,0 +1,55 @@
+"""
+Indexes for case-insensitive substring search on admin list columns.
+
+Django's ``icontains`` compiles to ``UPPER(column::text) LIKE UPPER('%term%')``
+on PostgreSQL, which a trigram GIN index over that expression serves; SQLite
+only uses an index for a case-insensitive prefix LIKE if it is NOCASE. Neither
+can be declared portably in ``Meta.indexes``, so they are created by raw SQL
+from the migrations, and again after every ``migrate`` (see the ``apps``
+modules), because SQLite drops a table's indexes when Django rebuilds it to
+alter a column.
+"""
+
+SUFFIXES = {'postgresql': 'trgm', 'sqlite': 'nocase'}
+
+
+def index_name(connection, table, column):
+    return f'{table}_{column}_{SUFFIXES[connection.vendor]}_idx'
+
+
+def install_search_indexes(connection, columns):
+    """Create the index for each ``(table, column)`` if it is missing; idempotent."""
+    if connection.vendor not in SUFFIXES:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, column in columns:
+            name = index_name(connection, table, column)
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+                )
+            else:
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column} COLLATE NOCASE)')
+
+
+def drop_search_indexes(connection, columns):
+    if connection.vendor not in SUFFIXES:
+        return
+    with connection.cursor() as cursor:
+        for table, column in columns:
+            cursor.execute(f'DROP INDEX IF EXISTS {index_name(connection, table, column)}')
+
+
+def reinstall_after_migrate(migration, columns):
+    """A ``post_migrate`` receiver reinstalling ``columns``' indexes once ``migration`` is applied."""
+    def receiver(sender, using, **kwargs):
+        from django.db import connections
+        from django.db.migrations.recorder import MigrationRecorder
+
+        connection = connections[using]
+        if migration in MigrationRecorder(connection).applied_migrations():
+            install_search_indexes(connection, columns)
+
+    return receiver
@@ -194,6 +194,44 @@ SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 60 * 60 * 24 * 30  # 30 days
 SESSION_SAVE_EVERY_REQUEST = True
 
+# Analytics ingestion
+# - MODE: 'sync' writes interactions inside the request, 'async' queues them
+#   in-process and a background thread flushes them in batches
+# - OVERFLOW: what to do when the queue is full ('write' in the request or 'drop')
+ANALYTICS_INGESTION = {
+    'MODE': os.environ.get('ANALYTICS_INGESTION_MODE', 'sync'),
+    'BATCH_SIZE': int(os.environ.get('ANALYTICS_INGESTION_BATCH_SIZE', 500)),
+    'FLUSH_INTERVAL': float(os.environ.get('ANALYTICS_INGESTION_FLUSH_INTERVAL', 2.0)),
+    'MAX_QUEUE_SIZE': int(os.environ.get('ANALYTICS_INGESTION_MAX_QUEUE_SIZE', 10000)),
+    'ENQUEUE_TIMEOUT': float(os.environ.get('ANALYTICS_INGESTION_ENQUEUE_TIMEOUT', 0.05)),
+    'OVERFLOW': os.environ.get('ANALYTICS_INGESTION_OVERFLOW', 'write'),
+}
+
+# Interactions newer than this are left for the next incremental rollup run,
+# so rows from transactions that have not committed yet are not skipped
+ANALYTICS_ROLLUP_LAG_SECONDS = int(os.environ.get('ANALYTICS_ROLLUP_LAG_SECONDS', 60))
+# Let analytics GET requests run the rollup themselves (a write) when the
+# scheduled `manage.py rollup_analytics` has not run since the day started,
+# rolling up at most ANALYTICS_ROLLUP_REQUEST_MAX_DAYS days per request
+ANALYTICS_ROLLUP_ON_READ = os.environ.get('ANALYTICS_ROLLUP_ON_READ', 'False').lower() in ('true', '1', 'yes')
+ANALYTICS_ROLLUP_REQUEST_MAX_DAYS = int(os.environ.get('ANALYTICS_ROLLUP_REQUEST_MAX_DAYS', 3))
+
+# Seconds a (days, category) product leaderboard is cached for the top-products reports
+ANALYTICS_LEADERBOARD_CACHE_TTL = int(os.environ.get('ANALYTICS_LEADERBOARD_CACHE_TTL', 60))
+
+# Raw interactions older than this many days are moved to the archive by
+# `manage.py archive_interactions` (daily stats keep the aggregates)
+ANALYTICS_RETENTION_DAYS = int(os.environ.get('ANALYTICS_RETENTION_DAYS', 90))
+
+# Seconds the product search vocabulary (used to correct typos in queries) is
+# kept in memory before it is re-read from the full-text index
+PRODUCT_SEARCH_VOCABULARY_TTL = int(os.environ.get('PRODUCT_SEARCH_VOCABULARY_TTL', 300))
+# Seconds before a process rebuilds its in-memory typeahead index; saves in the
+# same process patch it immediately, this bounds staleness for everything else
+PRODUCT_SUGGEST_INDEX_TTL = int(os.environ.get('PRODUCT_SUGGEST_INDEX_TTL', 300))
+# Seconds the per-query facet count table of the product listing is cached
+PRODUCT_FACET_CACHE_TTL = int(os.environ.get('PRODUCT_FACET_CACHE_TTL', 60))
+
 # Stripe Settings
 # Sign up at https://stripe.com to get your keys
 # Set these environment variables or create a .env file:
@@ -203,3 +241,20 @@ SESSION_SAVE_EVERY_REQUEST = True
 STRIPE_PUBLISHABLE_KEY = os.environ.get('STRIPE_PUBLISHABLE_KEY', '')
 STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
 STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
+# Optional API base override, e.g. http://localhost:12111 for a local stripe-mock server
+STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE', '')
+# When enabled, checkout creates Stripe orders as pending and the
+# payment_intent.succeeded webhook marks them paid (no Stripe call in the request)
+STRIPE_CONFIRM_VIA_WEBHOOK = os.environ.get('STRIPE_CONFIRM_VIA_WEBHOOK', 'False').lower() in ('true', '1', 'yes')
+# Background threads processing recorded webhook events
+STRIPE_WEBHOOK_WORKERS = int(os.environ.get('STRIPE_WEBHOOK_WORKERS', 2))
+
+# Report exports
+# Finished export files are written here and served only through the admin API
+EXPORT_ROOT = Path(os.environ.get('EXPORT_ROOT', BASE_DIR / 'exports'))
+# Export jobs are rendered by a separate `python manage.py process_export_jobs
+# --watch` worker (see Procfile). A positive value also renders them on that
+# many background threads inside the web processes, e.g. for local development
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 0))
+# Finished export jobs (and their files) older than this are purged
+EXPORT_RETENTION_HOURS = int(os.environ.get('EXPORT_RETENTION_HOURS', 24))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Order, OrderItem
+from .models import ExportJob, Order, OrderItem, StripeWebhookEvent
 
 
 class OrderItemInline(admin.TabularInline):
@@ -16,3 +16,20 @@ class OrderAdmin(admin.ModelAdmin):
     readonly_fields = ['order_number', 'subtotal', 'total', 'created_at', 'updated_at']
     inlines = [OrderItemInline]
     list_editable = ['status', 'payment_status']
+
+
+@admin.register(StripeWebhookEvent)
+class StripeWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'event_type', 'payment_intent_id', 'status', 'attempts', 'created_at']
+    list_filter = ['status', 'event_type']
+    search_fields = ['event_id', 'payment_intent_id']
+    readonly_fields = ['event_id', 'event_type', 'payment_intent_id', 'payload', 'attempts', 'last_error',
+                       'created_at', 'updated_at', 'processed_at']
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'status', 'file_name', 'file_size', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    readonly_fields = ['kind', 'params', 'fingerprint', 'status', 'file_name', 'file_size', 'error',
+                       'requested_by', 'created_at', 'updated_at', 'started_at', 'finished_at']
@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+from core.search_indexes import reinstall_after_migrate
+
+SEARCH_INDEX_MIGRATION = ('orders', '0008_order_list_indexes')
+# Columns searched by the admin order list (see core.filters.IndexedSearchFilter)
+SEARCH_INDEX_COLUMNS = [
+    ('orders', column) for column in ['order_number', 'email', 'first_name', 'last_name', 'phone']
+]
+
+
+class OrdersConfig(AppConfig):
+    name = 'orders'
+    
+    def ready(self):
+        post_migrate.connect(
+            reinstall_after_migrate(SEARCH_INDEX_MIGRATION, SEARCH_INDEX_COLUMNS), sender=self, weak=False
+        )
@@ -0,0 +1,248 @@
+"""
+Background report exports.
+
+Submitting an export records an ``ExportJob`` and returns immediately; the
+report is rendered by the ``process_export_jobs`` command running as a
+separate worker process (or, with ``EXPORT_WORKERS > 0``, also by a small
+thread pool in the web process once the transaction commits) and written
+under ``EXPORT_ROOT``.
+
+Every job carries a fingerprint of its kind, its params and the row counts and
+latest modification times of the data the report reads. A new submission
+with the same fingerprint reuses the queued, running or finished job instead
+of rendering the report again, so a file stays cached until the data changes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from . import reports
+from .models import ExportJob, Order
+
+logger = logging.getLogger(__name__)
+
+XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PDF = 'application/pdf'
+
+ExportKind = namedtuple('ExportKind', ['writer', 'content_type', 'extension', 'prefix', 'params'])
+
+EXPORTS = {
+    'orders_excel': ExportKind(reports.write_orders_excel, XLSX, 'xlsx', 'orders_export', 'orders'),
+    'orders_pdf': ExportKind(reports.write_orders_pdf, PDF, 'pdf', 'orders_report', 'orders'),
+    'analytics_excel': ExportKind(reports.write_analytics_excel, XLSX, 'xlsx', 'analytics_export', 'analytics'),
+    'analytics_pdf': ExportKind(reports.write_analytics_pdf, PDF, 'pdf', 'analytics_report', 'analytics'),
+    'products_excel': ExportKind(reports.write_products_excel, XLSX, 'xlsx', 'products_export', 'products'),
+}
+
+
+def clean_params(kind, data):
+    """Validate and normalise the params for an export kind; raises ValueError."""
+    if kind not in EXPORTS:
+        raise ValueError(f"Unknown export kind '{kind}'")
+
+    group = EXPORTS[kind].params
+    if group == 'orders':
+        params = {}
+        statuses = {
+            'status': dict(Order.STATUS_CHOICES),
+            'payment_status': dict(Order.PAYMENT_STATUS_CHOICES),
+        }
+        for name, choices in statuses.items():
+            value = data.get(name)
+            if value:
+                if value not in choices:
+                    raise ValueError(f"Invalid {name} '{value}'")
+                params[name] = value
+        for name in ('start_date', 'end_date'):
+            value = data.get(name)
+            if value:
+                try:
+                    params[name] = date.fromisoformat(value).isoformat()
+                except (TypeError, ValueError):
+                    raise ValueError(f"{name} must be a YYYY-MM-DD date")
+        return params
+
+    if group == 'analytics':
+        try:
+            days = int(data.get('days', 30))
+        except (TypeError, ValueError):
+            raise ValueError('days must be an integer')
+        if not 1 <= days <= 3650:
+            raise ValueError('days must be between 1 and 3650')
+        return {'days': days}
+
+    return {}
+
+
+def _data_version(kind, params):
+    """Row counts and latest change times of everything the report reads."""
+    from analytics.models import ProductInteraction
+    from products.models import Category, Product
+
+    group = EXPORTS[kind].params
+    if group == 'orders':
+        return reports.filter_orders(params).aggregate(count=Count('id'), changed=Max('updated_at'))
+
+    products = Product.objects.aggregate(count=Count('id'), changed=Max('updated_at'))
+    if group == 'products':
+        categories = Category.objects.aggregate(count=Count('id'), changed=Max('updated_at'))
+        return {'products': products, 'categories': categories}
+
+    start = timezone.now() - timedelta(days=params['days'])
+    return {
+        'products': products,
+        'orders': Order.objects.filter(created_at__gte=start).aggregate(
+            count=Count('id'), changed=Max('updated_at')
+        ),
+        'interactions': ProductInteraction.objects.filter(created_at__gte=start).aggregate(
+            count=Count('id'), changed=Max('created_at')
+        ),
+    }
+
+
+def fingerprint(kind, params):
+    payload = {'kind': kind, 'params': params, 'data': _data_version(kind, params)}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def export_root():
+    return Path(getattr(settings, 'EXPORT_ROOT', Path(settings.BASE_DIR) / 'exports'))
+
+
+def job_path(job):
+    return export_root() / f'{job.pk}.{EXPORTS[job.kind].extension}'
+
+
+def find_cached(kind, fp):
+    """The newest queued, running or finished job for this fingerprint, if still usable."""
+    jobs = ExportJob.objects.filter(
+        kind=kind, fingerprint=fp, status__in=['pending', 'running', 'completed']
+    ).order_by('-created_at')
+    for job in jobs[:5]:
+        if job.status != 'completed' or job_path(job).exists():
+            return job
+    return None
+
+
+def submit_job(kind, data, user=None):
+    """
+    Queue an export, or return the job that already covers the same params and
+    data. Returns (job, created); raises ValueError for invalid params.
+    """
+    params = clean_params(kind, data)
+    fp = fingerprint(kind, params)
+    job = find_cached(kind, fp)
+    if job:
+        return job, False
+
+    job = ExportJob.objects.create(kind=kind, params=params, fingerprint=fp, requested_by=user)
+    enqueue_job(job.pk)
+    return job, True
+
+
+def run_job(job_id):
+    """Render one pending job to disk, unless another worker already claimed it."""
+    now = timezone.now()
+    claimed = ExportJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', started_at=now, updated_at=now
+    )
+    if not claimed:
+        return None
+
+    job = ExportJob.objects.get(pk=job_id)
+    export = EXPORTS[job.kind]
+    path = job_path(job)
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'wb') as out:
+            export.writer(job.params, out)
+        os.replace(tmp_path, path)
+        job.status = 'completed'
+        job.file_name = f'{export.prefix}_{timezone.localtime():%Y%m%d_%H%M%S}.{export.extension}'
+        job.file_size = path.stat().st_size
+        job.error = ''
+    except Exception as e:
+        logger.exception('Export job %s failed', job.pk)
+        tmp_path.unlink(missing_ok=True)
+        job.status = 'failed'
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'file_name', 'file_size', 'error', 'finished_at', 'updated_at'])
+    return job.status
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Re-create the pool after a fork, since threads do not survive it
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'EXPORT_WORKERS', 0),
+                thread_name_prefix='exports',
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    except Exception:
+        logger.exception('Export worker failed for %s', job_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue_job(job_id):
+    """Run a job on the in-process pool once the current transaction commits."""
+    if getattr(settings, 'EXPORT_WORKERS', 0) > 0:
+        transaction.on_commit(lambda: _get_executor().submit(_run, job_id))
+
+
+def process_pending_jobs(stale_after=timedelta(minutes=30)):
+    """
+    Synchronously run queued jobs, after failing ``running`` ones whose worker
+    died. Returns a status count.
+    """
+    stale = timezone.now() - stale_after
+    ExportJob.objects.filter(status='running', updated_at__lt=stale).update(
+        status='failed', error='Worker stopped before the export finished'
+    )
+
+    counts = {}
+    for job_id in ExportJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True):
+        result = run_job(job_id)
+        if result:
+            counts[result] = counts.get(result, 0) + 1
+    return counts
+
+
+def purge_jobs(older_than):
+    """Delete jobs finished before ``older_than`` along with their files; returns the count."""
+    jobs = ExportJob.objects.filter(status__in=['completed', 'failed'], updated_at__lt=older_than)
+    deleted = 0
+    for job in jobs.iterator():
+        job_path(job).unlink(missing_ok=True)
+        job.delete()
+        deleted += 1
+    return deleted
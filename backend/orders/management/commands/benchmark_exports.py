@@ -0,0 +1,120 @@
+import resource
+import tempfile
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from orders import reports
+from orders.models import Order, OrderItem
+
+EXCEL_WRITERS = {
+    'orders_excel': reports.write_orders_excel,
+    'analytics_excel': reports.write_analytics_excel,
+    'products_excel': reports.write_products_excel,
+}
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = 'Compare time and peak memory of Excel exports in write-only and in-memory workbook modes'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=0,
+            help='Insert this many synthetic orders for the run (rolled back afterwards), e.g. 500000',
+        )
+        parser.add_argument(
+            '--items-per-order',
+            type=int,
+            default=2,
+            help='Order items per synthetic order',
+        )
+        parser.add_argument(
+            '--kind',
+            choices=sorted(EXCEL_WRITERS),
+            default='orders_excel',
+            help='Export to benchmark',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Window for analytics_excel',
+        )
+        parser.add_argument(
+            '--skip-in-memory',
+            action='store_true',
+            help='Only run the write-only mode (the in-memory mode can need several GB for large seeds)',
+        )
+    
+    def handle(self, *args, **options):
+        writer = EXCEL_WRITERS[options['kind']]
+        params = {'days': options['days']} if options['kind'] == 'analytics_excel' else {}
+        modes = [('write-only', True)] + ([] if options['skip_in_memory'] else [('in-memory', False)])
+        
+        with transaction.atomic():
+            if options['orders']:
+                self.seed(options['orders'], options['items_per_order'])
+            
+            # Peak RSS only ever grows, so the write-only mode runs first
+            self.stdout.write(f'{"mode":<12} {"seconds":>9} {"peak RSS MB":>12} {"file MB":>9}')
+            for label, write_only in modes:
+                seconds, size = self.measure(writer, params, write_only)
+                peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                self.stdout.write(f'{label:<12} {seconds:>9.2f} {peak:>12.1f} {size / 2**20:>9.1f}')
+            
+            transaction.set_rollback(True)
+    
+    def measure(self, writer, params, write_only):
+        with tempfile.TemporaryFile() as out:
+            started = time.perf_counter()
+            writer(params, out, write_only=write_only)
+            return time.perf_counter() - started, out.tell()
+    
+    def seed(self, count, items_per_order):
+        self.stdout.write(f'Seeding {count} orders with {items_per_order} items each...')
+        now = timezone.now()
+        price = Decimal('499.00')
+        statuses = [value for value, _ in Order.STATUS_CHOICES]
+        
+        for offset in range(0, count, BATCH_SIZE):
+            orders = [
+                Order(
+                    order_number=f'BENCH{n:012d}',
+                    email=f'customer{n % 5000}@example.com',
+                    first_name='Bench',
+                    last_name=f'Customer {n % 5000}',
+                    phone='0000000000',
+                    shipping_address='1 Benchmark Street',
+                    shipping_city='Mumbai',
+                    shipping_state='MH',
+                    shipping_zip='400001',
+                    subtotal=price * items_per_order,
+                    total=price * items_per_order,
+                    status=statuses[n % len(statuses)],
+                    payment_status='paid' if n % 3 else 'pending',
+                    payment_method='cod',
+                )
+                for n in range(offset, min(offset + BATCH_SIZE, count))
+            ]
+            Order.objects.bulk_create(orders)
+            OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product_name=f'Product {i}',
+                    product_sku=f'SKU-{i}',
+                    quantity=1,
+                    unit_price=price,
+                    total_price=price,
+                )
+                for order in orders
+                for i in range(items_per_order)
+            ])
+            self.stdout.write(f'  {offset + len(orders)}/{count}')
+        self.stdout.write(f'Seeded in {(timezone.now() - now).total_seconds():.1f}s')
@@ -0,0 +1,49 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from orders.exports import process_pending_jobs, purge_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued export jobs and purge expired export files'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch',
+            type=float,
+            default=0,
+            help='Keep polling for new jobs every this many seconds (run as a dedicated worker)',
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=30,
+            help='Treat jobs stuck in running for this long as failed',
+        )
+    
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options['stale_minutes'])
+        while True:
+            self.run_once(stale_after, quiet=bool(options['watch']))
+            if not options['watch']:
+                return
+            close_old_connections()
+            time.sleep(options['watch'])
+    
+    def run_once(self, stale_after, quiet=False):
+        retention = timedelta(hours=getattr(settings, 'EXPORT_RETENTION_HOURS', 24))
+        purged = purge_jobs(timezone.now() - retention)
+        counts = process_pending_jobs(stale_after=stale_after)
+        
+        if purged:
+            self.stdout.write(f'Purged {purged} expired export jobs.')
+        if counts:
+            summary = ', '.join(f'{count} {state}' for state, count in sorted(counts.items()))
+            self.stdout.write(self.style.SUCCESS(f'Processed export jobs: {summary}'))
+        elif not quiet:
+            self.stdout.write('No export jobs to process.')
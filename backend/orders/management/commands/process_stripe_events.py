@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from orders.webhooks import process_pending_events
+
+
+class Command(BaseCommand):
+    help = 'Process Stripe webhook events that were recorded but never handled'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=10,
+            help='Treat events stuck in processing for this long as failed',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Skip events that already failed this many times',
+        )
+        parser.add_argument(
+            '--include-unmatched',
+            action='store_true',
+            help='Also retry events whose order did not exist yet',
+        )
+    
+    def handle(self, *args, **options):
+        counts = process_pending_events(
+            stale_after=timedelta(minutes=options['stale_minutes']),
+            max_attempts=options['max_attempts'],
+            include_unmatched=options['include_unmatched'],
+        )
+        if not counts:
+            self.stdout.write('No Stripe events to process.')
+            return
+        
+        summary = ', '.join(f'{count} {state}' for state, count in sorted(counts.items()))
+        self.stdout.write(self.style.SUCCESS(f'Processed Stripe events: {summary}'))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:30
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_stripe_migration'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='stripe_payment_intent_id',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+        migrations.CreateModel(
+            name='StripeWebhookEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('event_id', models.CharField(max_length=255, unique=True)),
+                ('event_type', models.CharField(max_length=100)),
+                ('payment_intent_id', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('payload', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('processed', 'Processed'), ('unmatched', 'No Matching Order'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Stripe Webhook Event',
+                'verbose_name_plural': 'Stripe Webhook Events',
+                'db_table': 'stripe_webhook_events',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='stripe_webh_status_1845e6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_stripe_webhook_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+            ],
+            options={
+                'db_table': 'order_number_sequence',
+            },
+        ),
+    ]
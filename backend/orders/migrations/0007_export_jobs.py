@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:35
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_number_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('orders_excel', 'Orders (Excel)'), ('orders_pdf', 'Orders (PDF)'), ('analytics_excel', 'Analytics (Excel)'), ('analytics_pdf', 'Analytics (PDF)'), ('products_excel', 'Products (Excel)')], max_length=30)),
+                ('params', models.JSONField(default=dict)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('file_name', models.CharField(blank=True, max_length=255)),
+                ('file_size', models.PositiveBigIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export Job',
+                'verbose_name_plural': 'Export Jobs',
+                'db_table': 'export_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['kind', 'fingerprint', 'status'], name='export_jobs_kind_80dcaa_idx'), models.Index(fields=['status', 'updated_at'], name='export_jobs_status_8a3126_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_search_indexes(apps, schema_editor):
+    from core import search_indexes
+    from orders.apps import SEARCH_INDEX_COLUMNS
+
+    search_indexes.install_search_indexes(schema_editor.connection, SEARCH_INDEX_COLUMNS)
+
+
+def drop_search_indexes(apps, schema_editor):
+    from core import search_indexes
+    from orders.apps import SEARCH_INDEX_COLUMNS
+
+    search_indexes.drop_search_indexes(schema_editor.connection, SEARCH_INDEX_COLUMNS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_export_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'id'], name='orders_created_f67d2c_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
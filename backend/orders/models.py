@@ -1,9 +1,31 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from products.models import Product
 import uuid
 
 
+class OrderNumberSequence(models.Model):
+    """
+    Source of order number counters: every allocated number inserts one row.
+    
+    Inserts take the next value of the table's auto-increment sequence, which
+    never blocks concurrent checkouts (unlike a shared counter row) and never
+    hands out the same value twice. Old rows carry no data and may be deleted.
+    """
+    
+    id = models.BigAutoField(primary_key=True)
+    
+    class Meta:
+        db_table = 'order_number_sequence'
+
+
+def generate_order_number():
+    """Return 'ORD' + YYMMDD + zero-padded sequence value, unique and increasing."""
+    value = OrderNumberSequence.objects.create().pk
+    return f"ORD{timezone.localdate():%y%m%d}{value:08d}"
+
+
 class Order(models.Model):
     """Order model."""
     
@@ -66,7 +88,7 @@ class Order(models.Model):
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES, default='stripe')
     
     # Stripe fields
-    stripe_payment_intent_id = models.CharField(max_length=100, blank=True, null=True)
+    stripe_payment_intent_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     stripe_client_secret = models.CharField(max_length=255, blank=True, null=True)
     stripe_client_secret = models.CharField(max_length=255, blank=True, null=True)
     
@@ -87,16 +109,17 @@ class Order(models.Model):
         verbose_name = 'Order'
         verbose_name_plural = 'Orders'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the admin order list
+            models.Index(fields=['created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"Order {self.order_number}"
     
     def save(self, *args, **kwargs):
         if not self.order_number:
-            # Generate order number
-            import random
-            import string
-            self.order_number = 'ORD' + ''.join(random.choices(string.digits, k=10))
+            self.order_number = generate_order_number()
         super().save(*args, **kwargs)
 
 
@@ -121,3 +144,91 @@ class OrderItem(models.Model):
     def save(self, *args, **kwargs):
         self.total_price = self.unit_price * self.quantity
         super().save(*args, **kwargs)
+
+
+class StripeWebhookEvent(models.Model):
+    """Stripe webhook event, stored once per Stripe event id and processed in the background."""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('unmatched', 'No Matching Order'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payment_intent_id = models.CharField(max_length=100, blank=True, db_index=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'stripe_webhook_events'
+        verbose_name = 'Stripe Webhook Event'
+        verbose_name_plural = 'Stripe Webhook Events'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} ({self.event_id})"
+
+
+class ExportJob(models.Model):
+    """Excel/PDF report built in the background; the file is reused while its fingerprint matches."""
+    
+    KIND_CHOICES = [
+        ('orders_excel', 'Orders (Excel)'),
+        ('orders_pdf', 'Orders (PDF)'),
+        ('analytics_excel', 'Analytics (Excel)'),
+        ('analytics_pdf', 'Analytics (PDF)'),
+        ('products_excel', 'Products (Excel)'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    file_name = models.CharField(max_length=255, blank=True)
+    file_size = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'export_jobs'
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['kind', 'fingerprint', 'status']),
+            models.Index(fields=['status', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} ({self.status})"
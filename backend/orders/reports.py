@@ -0,0 +1,693 @@
+"""
+Excel and PDF report builders.
+
+Each ``write_*`` function renders one report for already validated params
+(see ``orders.exports.clean_params``) into a binary file object. They run
+in the background export jobs (``orders.exports``), which the export views
+only submit and poll, and in the ``benchmark_exports`` command.
+"""
+
+from datetime import datetime
+
+from .models import Order, OrderItem
+
+
+CHUNK_SIZE = 2000
+
+HEADER_STYLE = 'export_header'
+TITLE_STYLE = 'export_title'
+
+
+class ExcelWriter:
+    """
+    Workbook used by the Excel reports.
+    
+    By default the workbook is write-only: rows are streamed to a temporary
+    file as they are appended, so memory stays flat however many rows a
+    report has. Header and title cells share named styles; data rows are
+    appended as plain values, which openpyxl writes several times faster
+    than styled cells. ``write_only=False`` builds a regular in-memory
+    workbook cell by cell instead (``benchmark_exports`` compares the two).
+    """
+    
+    def __init__(self, write_only=True):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+        
+        self.write_only = write_only
+        self.workbook = Workbook(write_only=write_only)
+        if not write_only:
+            self.workbook.remove(self.workbook.active)
+        self._next_row = {}
+        
+        thin = Side(style='thin')
+        for style in [
+            NamedStyle(
+                HEADER_STYLE, font=Font(bold=True, color="FFFFFF"),
+                border=Border(left=thin, right=thin, top=thin, bottom=thin),
+                fill=PatternFill(start_color="1976D2", end_color="1976D2", fill_type="solid"),
+                alignment=Alignment(horizontal='center')
+            ),
+            NamedStyle(TITLE_STYLE, font=Font(bold=True, size=12)),
+        ]:
+            self.workbook.add_named_style(style)
+    
+    def sheet(self, title, headers=None, widths=()):
+        """Add a worksheet; column widths must be set before any row is written."""
+        from openpyxl.utils import get_column_letter
+        
+        ws = self.workbook.create_sheet(title=title)
+        for col, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(col)].width = width
+        self._next_row[ws.title] = 1
+        if headers:
+            self.append(ws, headers, HEADER_STYLE)
+        return ws
+    
+    def append(self, ws, values, style=None):
+        """Write one row; ``style`` is a named style, a list of them per column, or None."""
+        styles = style if isinstance(style, (list, tuple)) else [style] * len(values)
+        
+        if self.write_only:
+            from openpyxl.cell import WriteOnlyCell
+            
+            if style is None:
+                ws.append(values)
+                return
+            row = []
+            for value, cell_style in zip(values, styles):
+                if cell_style:
+                    value = WriteOnlyCell(ws, value=value)
+                    value.style = cell_style
+                row.append(value)
+            ws.append(row)
+            return
+        
+        row = self._next_row[ws.title]
+        for col, (value, cell_style) in enumerate(zip(values, styles), 1):
+            cell = ws.cell(row=row, column=col, value=value)
+            if cell_style:
+                cell.style = cell_style
+        self._next_row[ws.title] = row + 1
+    
+    def save(self, out):
+        self.workbook.save(out)
+
+
+def filter_orders(params):
+    """Orders matching the status, payment status and date filters, newest first."""
+    orders = Order.objects.all().order_by('-created_at')
+    if params.get('status'):
+        orders = orders.filter(status=params['status'])
+    if params.get('payment_status'):
+        orders = orders.filter(payment_status=params['payment_status'])
+    if params.get('start_date'):
+        orders = orders.filter(created_at__date__gte=params['start_date'])
+    if params.get('end_date'):
+        orders = orders.filter(created_at__date__lte=params['end_date'])
+    return orders
+
+
+def write_orders_excel(params, out, write_only=True):
+    """Orders, order items and a summary sheet as an Excel workbook."""
+    from django.db.models import Count, Q, Sum
+    
+    orders = filter_orders(params)
+    statuses = dict(Order.STATUS_CHOICES)
+    payment_statuses = dict(Order.PAYMENT_STATUS_CHOICES)
+    payment_methods = dict(Order.PAYMENT_METHOD_CHOICES)
+    
+    excel = ExcelWriter(write_only)
+    
+    # === Orders Sheet ===
+    order_headers = [
+        'Order Number', 'Date', 'Customer Name', 'Email', 'Phone',
+        'Shipping Address', 'City', 'State', 'ZIP', 'Country',
+        'Subtotal', 'Shipping', 'Tax', 'Total',
+        'Status', 'Payment Status', 'Payment Method',
+        'Stripe Payment ID', 'Tracking Number', 'Estimated Delivery', 'Admin Notes'
+    ]
+    ws_orders = excel.sheet("Orders", order_headers, [15] * len(order_headers))
+    
+    order_rows = orders.values_list(
+        'order_number', 'created_at', 'first_name', 'last_name', 'email', 'phone',
+        'shipping_address', 'shipping_city', 'shipping_state', 'shipping_zip', 'shipping_country',
+        'subtotal', 'shipping_cost', 'tax', 'total', 'status', 'payment_status', 'payment_method',
+        'stripe_payment_intent_id', 'tracking_number', 'estimated_delivery', 'admin_notes',
+        named=True
+    )
+    for order in order_rows.iterator(chunk_size=CHUNK_SIZE):
+        excel.append(ws_orders, [
+            order.order_number,
+            order.created_at.strftime('%Y-%m-%d %H:%M'),
+            f"{order.first_name} {order.last_name}",
+            order.email,
+            order.phone,
+            order.shipping_address,
+            order.shipping_city,
+            order.shipping_state,
+            order.shipping_zip,
+            order.shipping_country,
+            float(order.subtotal),
+            float(order.shipping_cost),
+            float(order.tax),
+            float(order.total),
+            statuses.get(order.status, order.status),
+            payment_statuses.get(order.payment_status, order.payment_status),
+            payment_methods.get(order.payment_method, order.payment_method),
+            order.stripe_payment_intent_id or '',
+            order.tracking_number or '',
+            order.estimated_delivery.strftime('%Y-%m-%d') if order.estimated_delivery else '',
+            order.admin_notes or ''
+        ])
+    
+    # === Order Items Sheet ===
+    item_headers = [
+        'Order Number', 'Order Date', 'Customer', 'Product Name', 'SKU',
+        'Quantity', 'Unit Price', 'Total Price', 'Order Status', 'Payment Status'
+    ]
+    ws_items = excel.sheet("Order Items", item_headers, [18] * len(item_headers))
+    
+    item_rows = OrderItem.objects.filter(order__in=orders.values('pk')).order_by(
+        '-order__created_at', 'order_id'
+    ).values_list(
+        'order__order_number', 'order__created_at', 'order__first_name', 'order__last_name',
+        'product_name', 'product_sku', 'quantity', 'unit_price', 'total_price',
+        'order__status', 'order__payment_status',
+        named=True
+    )
+    total_items = 0
+    for item in item_rows.iterator(chunk_size=CHUNK_SIZE):
+        excel.append(ws_items, [
+            item.order__order_number,
+            item.order__created_at.strftime('%Y-%m-%d'),
+            f"{item.order__first_name} {item.order__last_name}",
+            item.product_name,
+            item.product_sku,
+            item.quantity,
+            float(item.unit_price),
+            float(item.total_price),
+            statuses.get(item.order__status, item.order__status),
+            payment_statuses.get(item.order__payment_status, item.order__payment_status)
+        ])
+        total_items += 1
+    
+    # === Summary Sheet ===
+    ws_summary = excel.sheet("Summary", widths=[25, 25])
+    
+    counts = orders.aggregate(
+        total_orders=Count('id'),
+        total_revenue=Sum('total', filter=Q(payment_status='paid')),
+        **{f'status_{value}': Count('id', filter=Q(status=value)) for value in statuses},
+        **{f'payment_{value}': Count('id', filter=Q(payment_status=value)) for value in payment_statuses},
+        **{f'method_{value}': Count('id', filter=Q(payment_method=value)) for value in payment_methods},
+    )
+    total_revenue = counts['total_revenue'] or 0
+    
+    summary_data = [
+        ('ORDERS EXPORT REPORT', ''),
+        ('Generated', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+        ('', ''),
+        ('OVERVIEW', ''),
+        ('Total Orders', counts['total_orders']),
+        ('Total Revenue', f"₹{total_revenue:,.2f}"),
+        ('Total Items Sold', total_items),
+        ('', ''),
+        ('ORDER STATUS BREAKDOWN', ''),
+        ('Pending', counts['status_pending']),
+        ('Confirmed', counts['status_confirmed']),
+        ('Processing', counts['status_processing']),
+        ('Shipped', counts['status_shipped']),
+        ('Out for Delivery', counts['status_out_for_delivery']),
+        ('Delivered', counts['status_delivered']),
+        ('Cancelled', counts['status_cancelled']),
+        ('Returned', counts['status_returned']),
+        ('', ''),
+        ('PAYMENT STATUS BREAKDOWN', ''),
+        ('Paid', counts['payment_paid']),
+        ('Pending Payment', counts['payment_pending']),
+        ('Failed', counts['payment_failed']),
+        ('Refunded', counts['payment_refunded']),
+        ('', ''),
+        ('PAYMENT METHOD BREAKDOWN', ''),
+        ('Stripe (Online)', counts['method_stripe']),
+        ('Cash on Delivery', counts['method_cod']),
+    ]
+    
+    titles = ['ORDERS EXPORT REPORT', 'OVERVIEW', 'ORDER STATUS BREAKDOWN', 'PAYMENT STATUS BREAKDOWN', 'PAYMENT METHOD BREAKDOWN']
+    for label, value in summary_data:
+        excel.append(ws_summary, [label, value], [TITLE_STYLE, None] if label in titles else None)
+    
+    excel.save(out)
+
+
+def write_orders_pdf(params, out):
+    """Orders summary and the latest 100 orders as a PDF report."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.enums import TA_CENTER
+    from django.db.models import Sum
+    
+    orders = filter_orders(params).prefetch_related('items', 'items__product')
+    
+    doc = SimpleDocTemplate(out, pagesize=landscape(A4), topMargin=0.5*inch, bottomMargin=0.5*inch)
+    
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    title_style = ParagraphStyle(
+        'CustomTitle', parent=styles['Heading1'], fontSize=24, spaceAfter=30,
+        alignment=TA_CENTER, textColor=colors.HexColor('#1976D2')
+    )
+    
+    section_style = ParagraphStyle(
+        'SectionTitle', parent=styles['Heading2'], fontSize=16, spaceBefore=20,
+        spaceAfter=10, textColor=colors.HexColor('#1976D2')
+    )
+    
+    # Title
+    elements.append(Paragraph("Orders Report", title_style))
+    elements.append(Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %H:%M')}", styles['Normal']))
+    elements.append(Spacer(1, 20))
+    
+    # Summary
+    total_orders = orders.count()
+    total_revenue = orders.filter(payment_status='paid').aggregate(total=Sum('total'))['total'] or 0
+    
+    elements.append(Paragraph("Summary", section_style))
+    
+    summary_data = [
+        ['Total Orders', 'Total Revenue', 'Paid', 'Pending', 'Delivered', 'Cancelled'],
+        [
+            str(total_orders),
+            f"₹{total_revenue:,.2f}",
+            str(orders.filter(payment_status='paid').count()),
+            str(orders.filter(payment_status='pending').count()),
+            str(orders.filter(status='delivered').count()),
+            str(orders.filter(status='cancelled').count())
+        ]
+    ]
+    
+    summary_table = Table(summary_data, colWidths=[1.6*inch]*6)
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976D2')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#E3F2FD')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.white),
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 20))
+    
+    # Orders Table
+    elements.append(Paragraph("Order Details", section_style))
+    
+    order_headers = ['Order #', 'Date', 'Customer', 'Email', 'Total', 'Status', 'Payment', 'Tracking']
+    order_data = [order_headers]
+    
+    for order in orders[:100]:  # Limit to 100 for PDF
+        order_data.append([
+            order.order_number,
+            order.created_at.strftime('%Y-%m-%d'),
+            f"{order.first_name} {order.last_name[:1]}.",
+            order.email[:20] + '...' if len(order.email) > 20 else order.email,
+            f"₹{order.total:,.0f}",
+            order.get_status_display()[:10],
+            order.get_payment_status_display()[:7],
+            order.tracking_number[:12] if order.tracking_number else '-'
+        ])
+    
+    order_table = Table(order_data, colWidths=[1.1*inch, 0.9*inch, 1.2*inch, 1.6*inch, 0.9*inch, 0.9*inch, 0.8*inch, 1.0*inch])
+    order_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976D2')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('TOPPADDING', (0, 1), (-1, -1), 5),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F5F5F5')]),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDBDBD')),
+    ]))
+    elements.append(order_table)
+    
+    if orders.count() > 100:
+        elements.append(Spacer(1, 10))
+        elements.append(Paragraph(f"Showing 100 of {orders.count()} orders. Download Excel for complete data.", styles['Normal']))
+    
+    doc.build(elements)
+
+
+def window_totals(orders, interactions):
+    """Order count and paid revenue plus interaction counts for a window, in two queries."""
+    from django.db.models import Count, Q, Sum
+    
+    totals = orders.aggregate(
+        orders=Count('id'),
+        revenue=Sum('total', filter=Q(payment_status='paid')),
+    )
+    totals.update(interactions.aggregate(
+        views=Count('id', filter=Q(interaction_type='view')),
+        cart_adds=Count('id', filter=Q(interaction_type='add_to_cart')),
+        purchases=Count('id', filter=Q(interaction_type='purchase')),
+    ))
+    totals['revenue'] = totals['revenue'] or 0
+    return totals
+
+
+def product_performance(start_date):
+    """
+    Products annotated with their views, cart adds and purchases since
+    ``start_date`` and the revenue of their paid order items, in one query.
+    """
+    from django.db.models import (
+        Count, DecimalField, FilteredRelation, OuterRef, Q, Subquery, Sum, Value
+    )
+    from django.db.models.functions import Coalesce
+    from products.models import Product
+    
+    revenue = OrderItem.objects.filter(
+        product=OuterRef('pk'),
+        order__created_at__gte=start_date,
+        order__payment_status='paid'
+    ).values('product').annotate(total=Sum('total_price')).values('total')
+    
+    return Product.objects.annotate(
+        window=FilteredRelation('interactions', condition=Q(interactions__created_at__gte=start_date)),
+    ).annotate(
+        views=Count('window', filter=Q(window__interaction_type='view')),
+        cart_adds=Count('window', filter=Q(window__interaction_type='add_to_cart')),
+        purchases=Count('window', filter=Q(window__interaction_type='purchase')),
+        revenue=Coalesce(
+            Subquery(revenue), Value(0), output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+    ).order_by('-created_at')
+
+
+def write_analytics_excel(params, out, write_only=True):
+    """Overview, product performance, daily, customer and interaction sheets."""
+    from django.db.models import Count, Max, Q, Sum
+    from django.db.models.functions import TruncDate
+    from django.utils import timezone
+    from datetime import timedelta
+    from analytics.models import ProductInteraction
+    
+    days = params['days']
+    start_date = timezone.now() - timedelta(days=days)
+    
+    excel = ExcelWriter(write_only)
+    
+    # === Overview Sheet ===
+    ws_overview = excel.sheet("Overview", widths=[25, 30])
+    
+    orders = Order.objects.filter(created_at__gte=start_date)
+    interactions = ProductInteraction.objects.filter(created_at__gte=start_date)
+    totals = window_totals(orders, interactions)
+    
+    overview_data = [
+        ('ANALYTICS EXPORT REPORT', ''),
+        ('Generated', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+        ('Period', f'Last {days} days'),
+        ('', ''),
+        ('KEY METRICS', ''),
+        ('Total Orders', totals['orders']),
+        ('Total Revenue', f"₹{totals['revenue']:,.2f}"),
+        ('Avg Order Value', f"₹{totals['revenue'] / max(totals['orders'], 1):,.2f}"),
+        ('', ''),
+        ('USER INTERACTIONS', ''),
+        ('Product Views', totals['views']),
+        ('Add to Cart', totals['cart_adds']),
+        ('Purchases', totals['purchases']),
+        ('Cart to Purchase Rate', f"{(totals['purchases'] / max(totals['cart_adds'], 1)) * 100:.2f}%"),
+        ('View to Purchase Rate', f"{(totals['purchases'] / max(totals['views'], 1)) * 100:.2f}%"),
+    ]
+    
+    titles = ['ANALYTICS EXPORT REPORT', 'KEY METRICS', 'USER INTERACTIONS']
+    for label, value in overview_data:
+        excel.append(ws_overview, [label, value], [TITLE_STYLE, None] if label in titles else None)
+    
+    # === Products Performance Sheet ===
+    product_headers = ['Product Name', 'SKU', 'Category', 'Price', 'Stock', 'Views', 'Cart Adds', 'Purchases', 'Revenue', 'Conversion Rate']
+    ws_products = excel.sheet("Products Performance", product_headers, [15] * len(product_headers))
+    
+    products = product_performance(start_date).values_list(
+        'name', 'sku', 'category__name', 'price', 'stock',
+        'views', 'cart_adds', 'purchases', 'revenue',
+        named=True
+    )
+    for product in products.iterator(chunk_size=CHUNK_SIZE):
+        conversion_rate = (product.purchases / max(product.views, 1)) * 100
+        excel.append(ws_products, [
+            product.name,
+            product.sku,
+            product.category__name or 'N/A',
+            float(product.price),
+            product.stock,
+            product.views,
+            product.cart_adds,
+            product.purchases,
+            float(product.revenue),
+            f"{conversion_rate:.2f}%"
+        ])
+    
+    # === Daily Stats Sheet ===
+    daily_headers = ['Date', 'Orders', 'Revenue', 'Items Sold', 'Views', 'Cart Adds', 'Purchases']
+    ws_daily = excel.sheet("Daily Stats", daily_headers, [15] * len(daily_headers))
+    
+    daily_orders = orders.annotate(date=TruncDate('created_at')).values('date').annotate(
+        count=Count('id'),
+        revenue=Sum('total')
+    ).order_by('date')
+    
+    items_sold = dict(
+        OrderItem.objects.filter(order__created_at__gte=start_date)
+        .annotate(date=TruncDate('order__created_at')).values('date')
+        .annotate(total=Sum('quantity')).values_list('date', 'total')
+    )
+    
+    daily_interactions = {
+        day['date']: day
+        for day in interactions.annotate(date=TruncDate('created_at')).values('date').annotate(
+            views=Count('id', filter=Q(interaction_type='view')),
+            cart_adds=Count('id', filter=Q(interaction_type='add_to_cart')),
+            purchases=Count('id', filter=Q(interaction_type='purchase')),
+        )
+    }
+    
+    for day_data in daily_orders:
+        date = day_data['date']
+        day_interactions = daily_interactions.get(date, {})
+        excel.append(ws_daily, [
+            date.strftime('%Y-%m-%d') if date else '',
+            day_data['count'],
+            float(day_data['revenue'] or 0),
+            items_sold.get(date) or 0,
+            day_interactions.get('views', 0),
+            day_interactions.get('cart_adds', 0),
+            day_interactions.get('purchases', 0)
+        ])
+    
+    # === Customers Sheet ===
+    customer_headers = ['Email', 'Name', 'Total Orders', 'Total Spent', 'Last Order', 'Avg Order Value']
+    ws_customers = excel.sheet("Customers", customer_headers, [20] * len(customer_headers))
+    
+    customer_data = orders.values('email', 'first_name', 'last_name').annotate(
+        order_count=Count('id'),
+        total_spent=Sum('total'),
+        last_order=Max('created_at')
+    ).order_by('-total_spent')
+    
+    for customer in customer_data.iterator(chunk_size=CHUNK_SIZE):
+        avg_value = float(customer['total_spent'] or 0) / max(customer['order_count'], 1)
+        excel.append(ws_customers, [
+            customer['email'],
+            f"{customer['first_name']} {customer['last_name']}",
+            customer['order_count'],
+            float(customer['total_spent'] or 0),
+            customer['last_order'].strftime('%Y-%m-%d') if customer['last_order'] else '',
+            avg_value
+        ])
+    
+    # === All Interactions Sheet ===
+    interaction_headers = ['Date', 'Time', 'Product', 'Interaction Type', 'User/Session', 'IP Address']
+    ws_interactions = excel.sheet("All Interactions", interaction_headers, [18] * len(interaction_headers))
+    
+    for interaction in interactions.select_related('product', 'user').order_by('-created_at')[:1000]:
+        excel.append(ws_interactions, [
+            interaction.created_at.strftime('%Y-%m-%d'),
+            interaction.created_at.strftime('%H:%M:%S'),
+            interaction.product.name if interaction.product else 'N/A',
+            interaction.interaction_type,
+            interaction.user.email if interaction.user else interaction.session_key[:20] if interaction.session_key else 'Anonymous',
+            interaction.ip_address or ''
+        ])
+    
+    excel.save(out)
+
+
+def write_analytics_pdf(params, out):
+    """Analytics key metrics and top products as a PDF report."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.enums import TA_CENTER
+    from django.utils import timezone
+    from datetime import timedelta
+    from analytics.models import ProductInteraction
+    
+    days = params['days']
+    start_date = timezone.now() - timedelta(days=days)
+    
+    doc = SimpleDocTemplate(out, pagesize=landscape(A4), topMargin=0.5*inch, bottomMargin=0.5*inch)
+    
+    elements = []
+    styles = getSampleStyleSheet()
+    
+    title_style = ParagraphStyle(
+        'CustomTitle', parent=styles['Heading1'], fontSize=24, spaceAfter=30,
+        alignment=TA_CENTER, textColor=colors.HexColor('#1976D2')
+    )
+    
+    section_style = ParagraphStyle(
+        'SectionTitle', parent=styles['Heading2'], fontSize=16, spaceBefore=20,
+        spaceAfter=10, textColor=colors.HexColor('#1976D2')
+    )
+    
+    elements.append(Paragraph("Analytics Dashboard Report", title_style))
+    elements.append(Paragraph(f"Period: Last {days} days | Generated: {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
+    elements.append(Spacer(1, 20))
+    
+    orders = Order.objects.filter(created_at__gte=start_date)
+    interactions = ProductInteraction.objects.filter(created_at__gte=start_date)
+    
+    totals = window_totals(orders, interactions)
+    total_revenue = totals['revenue']
+    total_orders = totals['orders']
+    total_views = totals['views']
+    total_cart = totals['cart_adds']
+    total_purchases = totals['purchases']
+    
+    # Key Metrics
+    elements.append(Paragraph("Key Metrics", section_style))
+    
+    metrics_data = [
+        ['Total Revenue', 'Total Orders', 'Avg Order', 'Views', 'Cart Adds', 'Conversion'],
+        [
+            f"₹{total_revenue:,.2f}",
+            str(total_orders),
+            f"₹{total_revenue / max(total_orders, 1):,.2f}",
+            str(total_views),
+            str(total_cart),
+            f"{(total_purchases / max(total_views, 1)) * 100:.2f}%"
+        ]
+    ]
+    
+    metrics_table = Table(metrics_data, colWidths=[1.6*inch]*6)
+    metrics_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1976D2')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#E3F2FD')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.white),
+    ]))
+    elements.append(metrics_table)
+    elements.append(Spacer(1, 20))
+    
+    # Top Products
+    elements.append(Paragraph("Top 10 Products by Revenue", section_style))
+    
+    top_products = product_performance(start_date).filter(revenue__gt=0).order_by('-revenue')[:10]
+    
+    product_headers = ['Product', 'Revenue', 'Views', 'Purchases', 'Conversion']
+    product_data = [product_headers]
+    
+    for product in top_products:
+        conversion = (product.purchases / max(product.views, 1)) * 100
+        
+        product_data.append([
+            product.name[:25],
+            f"₹{product.revenue:,.0f}",
+            str(product.views),
+            str(product.purchases),
+            f"{conversion:.1f}%"
+        ])
+    
+    if len(product_data) > 1:
+        product_table = Table(product_data, colWidths=[3.5*inch, 1.2*inch, 1*inch, 1*inch, 1*inch])
+        product_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4CAF50')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F5F5F5')]),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDBDBD')),
+        ]))
+        elements.append(product_table)
+    
+    doc.build(elements)
+
+
+def write_products_excel(params, out, write_only=True):
+    """Product catalogue and categories as an Excel workbook."""
+    from django.db.models import Count, Q
+    from products.models import Product, Category
+    
+    excel = ExcelWriter(write_only)
+    
+    # Products Sheet
+    headers = ['ID', 'SKU', 'Name', 'Category', 'Price', 'Discounted Price', 'Stock', 'Active', 'Featured', 'Created', 'Description']
+    ws_products = excel.sheet("Products", headers, [15] * len(headers))
+    
+    products = Product.objects.values_list(
+        'id', 'sku', 'name', 'category__name', 'price', 'discount_price', 'stock',
+        'is_active', 'is_featured', 'created_at', 'description',
+        named=True
+    )
+    for product in products.iterator(chunk_size=CHUNK_SIZE):
+        excel.append(ws_products, [
+            str(product.id),
+            product.sku,
+            product.name,
+            product.category__name or 'N/A',
+            float(product.price),
+            float(product.discount_price) if product.discount_price else '',
+            product.stock,
+            'Yes' if product.is_active else 'No',
+            'Yes' if product.is_featured else 'No',
+            product.created_at.strftime('%Y-%m-%d'),
+            product.description[:100] if product.description else ''
+        ])
+    
+    # Categories Sheet
+    cat_headers = ['ID', 'Name', 'Products Count', 'Active Products']
+    ws_categories = excel.sheet("Categories", cat_headers, [18] * len(cat_headers))
+    
+    categories = Category.objects.annotate(
+        product_total=Count('products'),
+        active_total=Count('products', filter=Q(products__is_active=True)),
+    ).order_by('name')
+    for category in categories:
+        excel.append(ws_categories, [
+            str(category.id),
+            category.name,
+            category.product_total,
+            category.active_total
+        ])
+    
+    excel.save(out)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Order, OrderItem
+from django.urls import reverse
+from .models import ExportJob, Order, OrderItem
 from products.serializers import ProductListSerializer
 
 
@@ -120,3 +121,25 @@ class OrderStatusUpdateSerializer(serializers.Serializer):
     tracking_number = serializers.CharField(max_length=100, required=False, allow_blank=True)
     estimated_delivery = serializers.DateField(required=False, allow_null=True)
     admin_notes = serializers.CharField(required=False, allow_blank=True)
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Serializer for background export jobs."""
+    
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    download_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'kind', 'kind_display', 'params', 'status', 'file_name', 'file_size',
+            'error', 'download_url', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+    
+    def get_download_url(self, obj):
+        if obj.status != 'completed':
+            return None
+        url = reverse('export-job-download', kwargs={'pk': obj.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,276 @@
+import json
+import threading
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from cart.models import Cart, CartItem
+from products.models import Category, Product
+from .models import Order, OrderItem, StripeWebhookEvent
+from .utils import InsufficientStock, reserve_stock
+from .views import CreateOrderView
+from .webhooks import _apply, process_event
+
+User = get_user_model()
+
+CHECKOUT = {
+    'email': 'buyer@example.com', 'first_name': 'A', 'last_name': 'B', 'shipping_address': '1 Road',
+    'shipping_city': 'Pune', 'shipping_state': 'MH', 'shipping_zip': '411001', 'payment_method': 'cod',
+}
+
+
+class CheckoutConcurrencyTests(TransactionTestCase):
+    """Concurrent checkouts must never oversell a product."""
+    
+    stock = 10
+    threads = 40
+    
+    def setUp(self):
+        category = Category.objects.create(name='Electronics', slug='electronics')
+        self.product = Product.objects.create(
+            name='Headphones', slug='headphones', sku='HP-1', description='',
+            price=50, stock=self.stock, category=category,
+        )
+    
+    def shopper(self, i):
+        user = User.objects.create_user(email=f'buyer{i}@example.com', username=f'buyer{i}', password=None)
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        return user
+    
+    def checkout(self, user, barrier, results):
+        try:
+            barrier.wait()
+            while True:
+                request = APIRequestFactory().post('/api/orders/create/', CHECKOUT, format='json')
+                force_authenticate(request, user)
+                try:
+                    response = CreateOrderView.as_view()(request)
+                except OperationalError:
+                    # SQLite serialises writers and reports a locked table
+                    # instead of waiting; try again like a retried request
+                    continue
+                results.append(response.status_code)
+                break
+        finally:
+            connection.close()
+    
+    @override_settings(ANALYTICS_INGESTION={'MODE': 'sync'})
+    def test_concurrent_checkouts_never_oversell(self):
+        shoppers = [self.shopper(i) for i in range(self.threads)]
+        barrier = threading.Barrier(self.threads)
+        results = []
+        workers = [
+            threading.Thread(target=self.checkout, args=(user, barrier, results))
+            for user in shoppers
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        self.product.refresh_from_db()
+        self.assertEqual(len(results), self.threads)
+        # A retry after a locked read following the commit finds the cart
+        # already emptied, so responses alone cannot count the sales
+        self.assertEqual(set(results) - {201, 400}, set())
+        self.assertEqual(self.product.stock, 0)
+        self.assertEqual(Order.objects.count(), self.stock)
+        self.assertEqual(OrderItem.objects.aggregate(sold=Sum('quantity'))['sold'], self.stock)
+        # Shoppers who lost the race keep their carts
+        self.assertEqual(CartItem.objects.count(), self.threads - self.stock)
+    
+    def test_short_product_leaves_other_stock_untouched(self):
+        other = Product.objects.create(
+            name='Cable', slug='cable', sku='CB-1', description='',
+            price=5, stock=3, category=self.product.category,
+        )
+        with self.assertRaises(InsufficientStock):
+            reserve_stock({self.product.id: 1, other.id: 4})
+        
+        self.product.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.product.stock, other.stock), (self.stock, 3))
+
+
+class PaymentIntentAmountTests(TestCase):
+    """The intent charges the cart total in exact paise."""
+    
+    def test_amount_is_not_truncated(self):
+        user = User.objects.create_user(email='buyer@example.com', username='buyer', password=None)
+        category = Category.objects.create(name='Books', slug='books')
+        product = Product.objects.create(
+            name='Novel', slug='novel', sku='BK-1', description='', price='19.99', stock=5, category=category,
+        )
+        CartItem.objects.create(cart=Cart.objects.create(user=user), product=product, quantity=1)
+        client = APIClient()
+        client.force_authenticate(user)
+        
+        intent = mock.Mock(client_secret='secret', id='pi_123')
+        with mock.patch('stripe.PaymentIntent.create', return_value=intent) as create:
+            response = client.post('/api/orders/stripe/create-payment-intent/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(create.call_args.kwargs['amount'], 1999)
+        self.assertEqual(response.data['amount'], 1999)
+
+
+class StripeWebhookProcessingTests(TestCase):
+    """payment_intent.succeeded marks exactly one order, and only for the amount received."""
+    
+    def create_order(self, total):
+        return Order.objects.create(
+            email='buyer@example.com', first_name='A', last_name='B', shipping_address='1 Road',
+            shipping_city='Pune', shipping_state='MH', shipping_zip='411001',
+            subtotal=total, total=total, stripe_payment_intent_id='pi_123',
+        )
+    
+    def succeeded(self, amount_received):
+        return StripeWebhookEvent.objects.create(
+            event_id='evt_1',
+            event_type='payment_intent.succeeded',
+            payment_intent_id='pi_123',
+            payload={'data': {'object': {'id': 'pi_123', 'amount_received': amount_received}}},
+        )
+    
+    def refunded(self, amount):
+        return StripeWebhookEvent.objects.create(
+            event_id='evt_2',
+            event_type='charge.refunded',
+            payment_intent_id='pi_123',
+            payload={'data': {'object': {'payment_intent': 'pi_123', 'amount': amount, 'refunded': True}}},
+        )
+    
+    def test_marks_only_the_order_with_the_received_amount(self):
+        other = self.create_order('99.00')
+        order = self.create_order('250.50')
+        
+        self.assertEqual(process_event(self.succeeded(25050).pk), 'processed')
+        
+        order.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((order.payment_status, order.status), ('paid', 'confirmed'))
+        self.assertEqual(other.payment_status, 'pending')
+    
+    def test_matches_totals_in_exact_paise(self):
+        # float(19.99) * 100 truncates to 1998
+        order = self.create_order('19.99')
+        
+        self.assertEqual(process_event(self.succeeded(1999).pk), 'processed')
+        
+        order.refresh_from_db()
+        self.assertEqual(order.payment_status, 'paid')
+    
+    def test_amount_mismatch_fails_without_marking_paid(self):
+        order = self.create_order('250.50')
+        
+        record = self.succeeded(100)
+        self.assertEqual(process_event(record.pk), 'failed')
+        
+        record.refresh_from_db()
+        order.refresh_from_db()
+        self.assertIn('totals', record.last_error)
+        self.assertEqual(order.payment_status, 'pending')
+    
+    def test_full_refund_marks_only_the_paid_order(self):
+        other = self.create_order('250.50')
+        order = self.create_order('250.50')
+        Order.objects.filter(pk=order.pk).update(payment_status='paid')
+        
+        self.assertEqual(process_event(self.refunded(25050).pk), 'processed')
+        
+        order.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(order.payment_status, 'refunded')
+        self.assertEqual(other.payment_status, 'pending')
+    
+    def test_event_without_order_is_unmatched_until_the_order_exists(self):
+        record = self.succeeded(25050)
+        self.assertEqual(process_event(record.pk), 'unmatched')
+        
+        order = self.create_order('250.50')
+        self.assertEqual(process_event(record.pk), 'processed')
+        order.refresh_from_db()
+        self.assertEqual(order.payment_status, 'paid')
+    
+    def test_order_committed_during_processing_is_rechecked(self):
+        record = self.succeeded(25050)
+        calls = []
+        
+        def apply(record):
+            if not calls:
+                # The checkout commits just after the worker looked for its order
+                calls.append(self.create_order('250.50'))
+                return False
+            return _apply(record)
+        
+        with mock.patch('orders.webhooks._apply', side_effect=apply):
+            self.assertEqual(process_event(record.pk), 'processed')
+        
+        calls[0].refresh_from_db()
+        self.assertEqual(calls[0].payment_status, 'paid')
+
+
+class AdminOrderPaginationTests(TestCase):
+    """Keyset cursors page through every order once, both ways, and reject bad cursors."""
+    
+    def setUp(self):
+        admin = User.objects.create_user(email='admin@example.com', username='admin', password=None, is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+        now = timezone.now()
+        for i in range(7):
+            order = Order.objects.create(
+                email=f'buyer{i}@example.com', first_name='A', last_name='B', shipping_address='1 Road',
+                shipping_city='Pune', shipping_state='MH', shipping_zip='411001', subtotal=10, total=10,
+            )
+            # Pairs share a timestamp, so pages also split on the pk tie-breaker
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(minutes=i // 2))
+        self.expected = [
+            str(pk) for pk in Order.objects.order_by('-created_at', '-pk').values_list('pk', flat=True)
+        ]
+    
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def ids(self, page):
+        return [str(order['id']) for order in page['results']]
+    
+    def test_next_and_previous_links_round_trip(self):
+        pages = [self.get('/api/orders/admin/?page_size=3')]
+        while pages[-1]['next']:
+            pages.append(self.get(pages[-1]['next']))
+        self.assertEqual([id_ for page in pages for id_ in self.ids(page)], self.expected)
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+        
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = self.get(page['previous'])
+            self.assertEqual(self.ids(page), self.ids(expected))
+        self.assertIsNone(page['previous'])
+    
+    def test_invalid_cursors_are_not_found(self):
+        order = Order.objects.first()
+        cursors = [
+            'not a cursor',
+            {'v': 'x', 'k': 'y'},
+            {'v': order.created_at.isoformat(), 'k': 'y'},
+            {'v': None, 'k': str(order.pk)},
+            {'v': order.created_at.isoformat()},
+            ['x'],
+        ]
+        for cursor in cursors:
+            if not isinstance(cursor, str):
+                cursor = urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/orders/admin/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
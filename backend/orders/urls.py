@@ -1,17 +1,18 @@
 from django.urls import path
 from .views import (
     CreateOrderView, OrderListView, OrderDetailView, TrackOrderView,
-    CreateStripePaymentIntentView, AdminOrderListView, AdminOrderDetailView,
+    CreateStripePaymentIntentView, StripeWebhookView, AdminOrderListView, AdminOrderDetailView,
     AdminUpdateOrderStatusView, AdminOrderStatsView,
     ExportOrdersExcelView, ExportOrdersPDFView,
     ExportAnalyticsExcelView, ExportAnalyticsPDFView,
-    ExportProductsExcelView
+    ExportProductsExcelView, ExportJobListView, ExportJobDetailView, ExportJobDownloadView
 )
 
 urlpatterns = [
     path('', OrderListView.as_view(), name='order-list'),
     path('create/', CreateOrderView.as_view(), name='create-order'),
     path('stripe/create-payment-intent/', CreateStripePaymentIntentView.as_view(), name='create-stripe-payment-intent'),
+    path('stripe/webhook/', StripeWebhookView.as_view(), name='stripe-webhook'),
     path('track/<str:order_number>/', TrackOrderView.as_view(), name='track-order'),
     path('<uuid:pk>/', OrderDetailView.as_view(), name='order-detail'),
     
@@ -27,4 +28,7 @@ urlpatterns = [
     path('admin/export/analytics/excel/', ExportAnalyticsExcelView.as_view(), name='export-analytics-excel'),
     path('admin/export/analytics/pdf/', ExportAnalyticsPDFView.as_view(), name='export-analytics-pdf'),
     path('admin/export/products/excel/', ExportProductsExcelView.as_view(), name='export-products-excel'),
+    path('admin/export/jobs/', ExportJobListView.as_view(), name='export-job-list'),
+    path('admin/export/jobs/<uuid:pk>/', ExportJobDetailView.as_view(), name='export-job-detail'),
+    path('admin/export/jobs/<uuid:pk>/download/', ExportJobDownloadView.as_view(), name='export-job-download'),
 ]
@@ -0,0 +1,56 @@
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, When
+from django.utils import timezone
+
+from products.models import Product
+
+
+def amount_in_paise(amount):
+    """Convert a rupee amount to the integer paise Stripe charges, without float rounding."""
+    return int((Decimal(amount) * 100).quantize(Decimal('1')))
+
+
+class InsufficientStock(Exception):
+    """Raised when a stock reservation cannot be satisfied for every product."""
+    
+    def __init__(self, product_names):
+        self.product_names = product_names
+        super().__init__(f"Insufficient stock for {', '.join(product_names)}")
+
+
+def reserve_stock(quantities):
+    """
+    Decrement stock for {product_id: quantity} in a single conditional UPDATE.
+
+    Each row is only updated if ``stock >= quantity`` at the moment the
+    database writes it, so concurrent checkouts can never drive stock below
+    zero. If any product falls short, nothing is decremented and
+    InsufficientStock is raised.
+    """
+    quantities = {product_id: qty for product_id, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return
+
+    condition = reduce(or_, (Q(id=product_id, stock__gte=qty) for product_id, qty in quantities.items()))
+    new_stock = Case(
+        *(When(id=product_id, then=F('stock') - qty) for product_id, qty in quantities.items()),
+        default=F('stock'),
+        output_field=PositiveIntegerField(),
+    )
+
+    try:
+        with transaction.atomic():
+            updated = Product.objects.filter(condition).update(stock=new_stock, updated_at=timezone.now())
+            if updated != len(quantities):
+                raise InsufficientStock([])
+    except InsufficientStock:
+        short = [
+            product.name
+            for product in Product.objects.filter(id__in=quantities).only('id', 'name', 'stock')
+            if product.stock < quantities[product.id]
+        ]
+        raise InsufficientStock(short or ['one or more products'])
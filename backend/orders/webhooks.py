@@ -0,0 +1,247 @@
+"""
+Stripe webhook handling.
+
+The webhook view only verifies the signature and records the event (one row
+per Stripe event id, so redeliveries are no-ops) before acknowledging it.
+Processing runs on a small thread pool once the recording transaction has
+committed and updates ``Order.payment_status`` for the event's payment
+intent. Events that arrive before their order exists are kept as
+``unmatched`` and re-processed once the order's transaction commits (the
+worker also re-checks after marking an event unmatched, so a checkout that
+commits mid-processing is not missed); the ``process_stripe_events``
+command retries anything left behind.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from .models import Order, StripeWebhookEvent
+from .utils import amount_in_paise
+
+logger = logging.getLogger(__name__)
+
+HANDLED_EVENTS = {
+    'payment_intent.succeeded',
+    'payment_intent.payment_failed',
+    'charge.refunded',
+}
+
+
+def payment_intent_for(event):
+    """Return the payment intent id an event refers to, or ''."""
+    obj = event.get('data', {}).get('object', {})
+    if event.get('type', '').startswith('payment_intent.'):
+        return obj.get('id') or ''
+    return obj.get('payment_intent') or ''
+
+
+def record_event(event):
+    """Store a verified event; returns (record, created)."""
+    try:
+        with transaction.atomic():
+            return StripeWebhookEvent.objects.get_or_create(
+                event_id=event['id'],
+                defaults={
+                    'event_type': event['type'],
+                    'payment_intent_id': payment_intent_for(event),
+                    'payload': event,
+                }
+            )
+    except IntegrityError:
+        # Stripe delivered the same event concurrently
+        return StripeWebhookEvent.objects.get(event_id=event['id']), False
+
+
+def _orders_totalling(orders, amount):
+    """``orders`` whose total is ``amount`` paise, compared as integers."""
+    return orders.filter(pk__in=[
+        pk for pk, total in orders.values_list('pk', 'total') if amount_in_paise(total) == amount
+    ])
+
+
+def _mark_paid(record, orders, now):
+    """
+    Mark the one order whose total matches the intent's ``amount_received``
+    as paid. The intent id alone is not unique, and an amount mismatch is
+    raised so the event stays visible as failed.
+    """
+    intent = record.payload.get('data', {}).get('object', {})
+    received = intent.get('amount_received')
+    if received is None:
+        raise ValueError(f'Payment intent {record.payment_intent_id} has no amount_received')
+
+    matching = _orders_totalling(orders, received)
+    if matching.filter(payment_status='paid').exists():
+        return
+    order_id = matching.exclude(payment_status='refunded').order_by('created_at').values_list(
+        'pk', flat=True
+    ).first()
+    if order_id is None:
+        raise ValueError(
+            f'No order for payment intent {record.payment_intent_id} totals {received} paise'
+        )
+    Order.objects.filter(pk=order_id).update(
+        payment_status='paid',
+        status=Case(When(status='pending', then=Value('confirmed')), default=F('status')),
+        updated_at=now,
+    )
+
+
+def _mark_refunded(record, orders, now):
+    """
+    Mark the paid order the refunded charge was for as refunded. Partial
+    refunds leave the order as paid; other orders sharing the intent are
+    left alone.
+    """
+    charge = record.payload.get('data', {}).get('object', {})
+    if not charge.get('refunded'):
+        return
+    amount = charge.get('amount')
+    if amount is None:
+        raise ValueError(f'Refunded charge for {record.payment_intent_id} has no amount')
+
+    matching = _orders_totalling(orders, amount)
+    order_id = matching.filter(payment_status='paid').order_by('created_at').values_list(
+        'pk', flat=True
+    ).first()
+    if order_id is None:
+        if matching.filter(payment_status='refunded').exists():
+            return
+        raise ValueError(
+            f'No paid order for payment intent {record.payment_intent_id} totals {amount} paise'
+        )
+    Order.objects.filter(pk=order_id).update(payment_status='refunded', updated_at=now)
+
+
+def _apply(record):
+    """Apply an event to its order; returns False if no order has its payment intent yet."""
+    orders = Order.objects.filter(stripe_payment_intent_id=record.payment_intent_id)
+    if not orders.exists():
+        return False
+    now = timezone.now()
+
+    if record.event_type == 'payment_intent.succeeded':
+        _mark_paid(record, orders, now)
+
+    elif record.event_type == 'payment_intent.payment_failed':
+        orders.filter(payment_status='pending').update(payment_status='failed', updated_at=now)
+
+    elif record.event_type == 'charge.refunded':
+        _mark_refunded(record, orders, now)
+
+    return True
+
+
+def process_event(record_id):
+    """Process one recorded event, unless another worker already claimed it."""
+    claimed = StripeWebhookEvent.objects.filter(
+        pk=record_id, status__in=['pending', 'unmatched', 'failed']
+    ).update(status='processing', attempts=F('attempts') + 1, updated_at=timezone.now())
+    if not claimed:
+        return None
+
+    record = StripeWebhookEvent.objects.get(pk=record_id)
+    try:
+        if record.event_type not in HANDLED_EVENTS or not record.payment_intent_id:
+            record.status = 'processed'
+        elif _apply(record):
+            record.status = 'processed'
+        else:
+            record.status = 'unmatched'
+        record.last_error = ''
+    except Exception as e:
+        logger.exception('Failed to process Stripe event %s', record.event_id)
+        record.status = 'failed'
+        record.last_error = str(e)
+
+    if record.status == 'processed':
+        record.processed_at = timezone.now()
+    record.save(update_fields=['status', 'last_error', 'processed_at', 'updated_at'])
+
+    # The order may have committed while this event was processing, after
+    # its checkout already looked for unmatched events; the save above is
+    # committed, so either this check or that checkout's sees the other.
+    if record.status == 'unmatched' and Order.objects.filter(
+        stripe_payment_intent_id=record.payment_intent_id
+    ).exists():
+        return process_event(record_id)
+    return record.status
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Re-create the pool after a fork, since threads do not survive it
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'STRIPE_WEBHOOK_WORKERS', 2),
+                thread_name_prefix='stripe-webhooks',
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run(record_id):
+    close_old_connections()
+    try:
+        process_event(record_id)
+    except Exception:
+        logger.exception('Stripe event worker failed for %s', record_id)
+    finally:
+        close_old_connections()
+
+
+def enqueue_event(record_id):
+    """Process an event in the background once the current transaction commits."""
+    transaction.on_commit(lambda: _get_executor().submit(_run, record_id))
+
+
+def _enqueue_unmatched(payment_intent_id):
+    for record_id in StripeWebhookEvent.objects.filter(
+        payment_intent_id=payment_intent_id, status='unmatched'
+    ).order_by('created_at').values_list('pk', flat=True):
+        enqueue_event(record_id)
+
+
+def enqueue_events_for_intent(payment_intent_id):
+    """
+    Once the current transaction commits, re-queue events that arrived
+    before the order for this intent existed.
+    """
+    if not payment_intent_id:
+        return
+    transaction.on_commit(lambda: _enqueue_unmatched(payment_intent_id))
+
+
+def process_pending_events(stale_after=timedelta(minutes=10), max_attempts=5, include_unmatched=False):
+    """
+    Synchronously process events that were never handled: pending or failed
+    ones, and ``processing`` ones whose worker died. Returns a status count.
+    """
+    stale = timezone.now() - stale_after
+    StripeWebhookEvent.objects.filter(status='processing', updated_at__lt=stale).update(status='failed')
+
+    statuses = ['pending', 'failed'] + (['unmatched'] if include_unmatched else [])
+    queryset = StripeWebhookEvent.objects.filter(
+        Q(status__in=statuses) & Q(attempts__lt=max_attempts)
+    ).order_by('created_at')
+
+    counts = {}
+    for record_id in queryset.values_list('pk', flat=True):
+        result = process_event(record_id)
+        if result:
+            counts[result] = counts.get(result, 0) + 1
+    return counts
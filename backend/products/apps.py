@@ -0,0 +1,48 @@
+from django.apps import AppConfig
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+SEARCH_INDEX_MIGRATION = ('products', '0003_product_search_index')
+
+
+def install_search_index(sender, using, **kwargs):
+    # SQLite drops the index triggers whenever a migration rebuilds the products table
+    from django.db import connections
+    from django.db.migrations.recorder import MigrationRecorder
+    from .search import install_index
+
+    connection = connections[using]
+    if SEARCH_INDEX_MIGRATION in MigrationRecorder(connection).applied_migrations():
+        install_index(connection)
+
+
+# Typeahead index patches, applied once the write is committed
+def product_saved(sender, instance, using, **kwargs):
+    from .suggest import product_changed
+    transaction.on_commit(lambda: product_changed(instance), using=using)
+
+
+def product_deleted(sender, instance, using, **kwargs):
+    from .suggest import product_changed
+    transaction.on_commit(lambda: product_changed(instance, deleted=True), using=using)
+
+
+def category_saved(sender, instance, using, **kwargs):
+    from .suggest import category_changed
+    transaction.on_commit(lambda: category_changed(instance), using=using)
+
+
+def category_deleted(sender, instance, using, **kwargs):
+    from .suggest import category_changed
+    transaction.on_commit(lambda: category_changed(instance, deleted=True), using=using)
+
+
+class ProductsConfig(AppConfig):
+    name = 'products'
+    
+    def ready(self):
+        post_migrate.connect(install_search_index, sender=self)
+        post_save.connect(product_saved, sender=self.get_model('Product'))
+        post_delete.connect(product_deleted, sender=self.get_model('Product'))
+        post_save.connect(category_saved, sender=self.get_model('Category'))
+        post_delete.connect(category_deleted, sender=self.get_model('Category'))
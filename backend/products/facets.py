@@ -0,0 +1,172 @@
+"""
+Facet counts for the product listing.
+
+One grouped query over the listing's base queryset (search and non-facet
+filters applied, facet filters not) returns a row per (category, brand, price
+range, in stock) combination with its product count. That table is cached
+for ``PRODUCT_FACET_CACHE_TTL`` seconds per base query, and every facet is
+counted from it in Python.
+
+Counts are disjunctive: each facet applies the other facets' selections but
+not its own, so a client can show how many products each alternative value
+would return.
+"""
+
+import hashlib
+from collections import namedtuple
+
+import django_filters
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, CharField, Count, F, Value, When
+from django.db.models.lookups import GreaterThan, LessThan
+
+FACETS = ['category', 'brand', 'price_range', 'in_stock']
+
+PriceRange = namedtuple('PriceRange', ['key', 'label', 'high'])
+
+# Upper bounds (exclusive) on the price the customer pays, i.e. the discount price when set
+PRICE_RANGES = [
+    PriceRange('under_500', 'Under ₹500', 500),
+    PriceRange('500_1000', '₹500 - ₹1,000', 1000),
+    PriceRange('1000_2500', '₹1,000 - ₹2,500', 2500),
+    PriceRange('2500_5000', '₹2,500 - ₹5,000', 5000),
+    PriceRange('5000_plus', '₹5,000 and above', None),
+]
+PRICE_RANGE_CHOICES = [(price_range.key, price_range.label) for price_range in PRICE_RANGES]
+
+CACHE_PREFIX = 'products:facets'
+
+FacetRow = namedtuple(
+    'FacetRow', ['category', 'category_name', 'category_slug', 'brand', 'price_range', 'in_stock', 'count']
+)
+
+
+def effective_price():
+    """Mirrors ``Product.final_price``."""
+    return Case(When(GreaterThan(F('discount_price'), 0), then=F('discount_price')), default=F('price'))
+
+
+def price_range_case():
+    """The ``PRICE_RANGES`` key of each product's effective price."""
+    price = effective_price()
+    return Case(
+        *[When(LessThan(price, price_range.high), then=Value(price_range.key)) for price_range in PRICE_RANGES[:-1]],
+        default=Value(PRICE_RANGES[-1].key),
+        output_field=CharField(),
+    )
+
+
+def filter_price_range(queryset, key):
+    for price_range in PRICE_RANGES:
+        if price_range.key == key:
+            return queryset.alias(facet_price_range=price_range_case()).filter(facet_price_range=key)
+    return queryset.none()
+
+
+def build_facet_table(queryset):
+    """Product counts per (category, brand, price range, in stock), in one grouped query."""
+    rows = queryset.order_by().annotate(
+        facet_price_range=price_range_case(),
+        facet_in_stock=Case(When(stock__gt=0, then=Value(True)), default=Value(False), output_field=BooleanField()),
+    ).values_list(
+        'category_id', 'category__name', 'category__slug', 'brand', 'facet_price_range', 'facet_in_stock'
+    ).annotate(count=Count('pk'))
+    return [
+        FacetRow(str(category), name, slug, brand, price_range, bool(in_stock), count)
+        for category, name, slug, brand, price_range, in_stock, count in rows
+    ]
+
+
+def get_facet_table(queryset):
+    """Cached ``build_facet_table``, keyed by the base query's SQL."""
+    key = f'{CACHE_PREFIX}:{hashlib.sha1(f"{queryset.db}:{queryset.query}".encode()).hexdigest()}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = build_facet_table(queryset)
+        cache.set(key, rows, getattr(settings, 'PRODUCT_FACET_CACHE_TTL', 60))
+    return rows
+
+
+def _row_value(row, facet):
+    if facet == 'in_stock':
+        return 'true' if row.in_stock else 'false'
+    return getattr(row, facet)
+
+
+def parse_boolean(value):
+    """
+    A query value as ``django_filters.BooleanFilter`` (and so ``ProductFilter.in_stock``)
+    reads it: True, False, or None when the value is not recognised.
+    """
+    field = django_filters.BooleanFilter().field
+    return field.clean(field.widget.value_from_datadict({'value': value}, {}, 'value'))
+
+
+def _parse_selected(selected):
+    """
+    Facet -> selected value as it appears in rows. An ``in_stock`` value the
+    listing's filter ignores is dropped, so counts describe the same listing.
+    """
+    parsed = {facet: value for facet, value in selected.items() if facet in FACETS and value not in (None, '')}
+    if 'in_stock' in parsed:
+        in_stock = parse_boolean(parsed.pop('in_stock'))
+        if in_stock is not None:
+            parsed['in_stock'] = 'true' if in_stock else 'false'
+    return parsed
+
+
+def _label(facet, value, categories):
+    if facet == 'category':
+        return categories.get(value, {}).get('name', '')
+    if facet == 'price_range':
+        return dict(PRICE_RANGE_CHOICES).get(value, value)
+    if facet == 'in_stock':
+        return 'In stock' if value == 'true' else 'Out of stock'
+    return value
+
+
+def count_facets(rows, selected):
+    """Disjunctive counts per facet value, given the selected value of each facet."""
+    selected = _parse_selected(selected)
+    counts = {facet: {} for facet in FACETS}
+    categories = {}
+    for row in rows:
+        categories[row.category] = {'name': row.category_name, 'slug': row.category_slug}
+        misses = [facet for facet, value in selected.items() if _row_value(row, facet) != value]
+        if len(misses) > 1:
+            continue
+        # A row counts towards a facet if it matches every other facet's selection
+        for facet in misses or FACETS:
+            value = _row_value(row, facet)
+            counts[facet][value] = counts[facet].get(value, 0) + row.count
+
+    ordered = {
+        'category': sorted(counts['category'], key=lambda value: (-counts['category'][value], categories[value]['name'])),
+        'brand': sorted((value for value in counts['brand'] if value), key=lambda value: (-counts['brand'][value], value)),
+        'price_range': [key for key, _ in PRICE_RANGE_CHOICES if key in counts['price_range']],
+        'in_stock': [value for value in ('true', 'false') if value in counts['in_stock']],
+    }
+
+    facets = {}
+    for facet in FACETS:
+        values = ordered[facet]
+        # Keep the selected value listed even when nothing matches it any more
+        if facet in selected and selected[facet] not in values:
+            values.append(selected[facet])
+        facets[facet] = [
+            {
+                'value': value,
+                'label': _label(facet, value, categories),
+                'count': counts[facet].get(value, 0),
+                'selected': selected.get(facet) == value,
+            }
+            for value in values
+        ]
+    for item in facets['category']:
+        item['slug'] = categories.get(item['value'], {}).get('slug', '')
+    return facets
+
+
+def facet_counts(queryset, selected):
+    return count_facets(get_facet_table(queryset), selected)
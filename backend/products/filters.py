@@ -0,0 +1,21 @@
+import django_filters
+
+from .facets import PRICE_RANGE_CHOICES, filter_price_range
+from .models import Product
+
+
+class ProductFilter(django_filters.FilterSet):
+    """Listing filters; ``category``, ``brand``, ``price_range`` and ``in_stock`` are also facets."""
+    
+    price_range = django_filters.ChoiceFilter(choices=PRICE_RANGE_CHOICES, method='filter_price_range')
+    in_stock = django_filters.BooleanFilter(method='filter_in_stock')
+    
+    class Meta:
+        model = Product
+        fields = ['category', 'brand', 'is_featured', 'price_range', 'in_stock']
+    
+    def filter_price_range(self, queryset, name, value):
+        return filter_price_range(queryset, value)
+    
+    def filter_in_stock(self, queryset, name, value):
+        return queryset.filter(stock__gt=0) if value else queryset.filter(stock=0)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from products.search import install_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Create the product full-text search index if missing and re-index every product'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database to index')
+    
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if not install_index(connection):
+            rebuild_index(connection)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the product search index ({connection.vendor}).'))
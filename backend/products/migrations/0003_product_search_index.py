@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:40
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from products.search import install_index
+
+    install_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from products.search import drop_index
+
+    drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_image_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
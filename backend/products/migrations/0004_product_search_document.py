@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(db_column='product_id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='products.product')),
+                ('document', models.TextField(db_column='products_fts')),
+            ],
+            options={
+                'db_table': 'products_fts',
+                'managed': False,
+            },
+        ),
+    ]
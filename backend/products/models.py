@@ -1,7 +1,21 @@
 from django.db import models
+from django.db.models import Count, Q
 import uuid
 
 
+class CategoryQuerySet(models.QuerySet):
+    
+    def with_product_count(self):
+        """Annotate each category with its number of active products."""
+        queryset = self.annotate(
+            active_product_count=Count('products', filter=Q(products__is_active=True))
+        )
+        # Meta.ordering is not applied to aggregated queries, so keep it explicitly
+        if not self.query.order_by:
+            queryset = queryset.order_by(*self.model._meta.ordering)
+        return queryset
+
+
 class Category(models.Model):
     """Product category model."""
     
@@ -14,6 +28,8 @@ class Category(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CategoryQuerySet.as_manager()
+    
     class Meta:
         db_table = 'categories'
         verbose_name = 'Category'
@@ -73,6 +89,26 @@ class Product(models.Model):
         return self.stock > 0
 
 
+class ProductSearchDocument(models.Model):
+    """
+    A product's row in the SQLite full-text index, ``products_fts``.
+    
+    The table is created by ``products.search.install_index`` and only joined
+    in searches, so the model is unmanaged.
+    """
+    
+    product = models.OneToOneField(
+        Product, on_delete=models.DO_NOTHING, primary_key=True, db_column='product_id',
+        db_constraint=False, related_name='search_document'
+    )
+    # FTS5's hidden column named after the table, which MATCH and bm25() take
+    document = models.TextField(db_column='products_fts')
+    
+    class Meta:
+        managed = False
+        db_table = 'products_fts'
+
+
 class ProductImage(models.Model):
     """Additional product images."""
     
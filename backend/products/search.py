@@ -0,0 +1,254 @@
+"""
+Full-text product search.
+
+The index is maintained by the database on every write to ``products``:
+
+* PostgreSQL: a GIN index over a weighted ``tsvector`` of the searchable
+  columns (``PG_DOCUMENT``); queries repeat the same expression so the
+  planner answers them from the index.
+* SQLite: an FTS5 table, ``products_fts``, holding a copy of the searchable
+  columns keyed by an unindexed ``product_id`` (not by ``products``' rowid,
+  which VACUUM may renumber) and kept in step with ``products`` by triggers.
+  Searches join it through ``ProductSearchDocument``.
+
+``install_index`` creates either one; it runs from the migration and again
+after every ``migrate``, because SQLite drops a table's triggers when Django
+rebuilds it to alter a column.
+
+Query terms are matched as prefixes and ANDed together. A term that is not a
+prefix of any indexed word also matches its closest indexed words, so small
+typos still find products. Results are ranked by relevance, name first.
+"""
+
+import difflib
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import BooleanField, F, FloatField, Func, Lookup, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
+from .models import ProductSearchDocument
+
+# Searchable columns, most to least significant
+SEARCH_COLUMNS = ['name', 'brand', 'sku', 'short_description', 'description']
+
+PG_CONFIG = 'english'
+PG_WEIGHTS = {'name': 'A', 'brand': 'B', 'sku': 'B', 'short_description': 'C', 'description': 'D'}
+PG_DOCUMENT = ' || '.join(
+    f"setweight(to_tsvector('{PG_CONFIG}'::regconfig, coalesce({{table}}{column}, '')), '{weight}')"
+    for column, weight in PG_WEIGHTS.items()
+)
+
+SQLITE_BM25_WEIGHTS = [10.0, 5.0, 5.0, 2.0, 1.0]
+
+MAX_TERMS = 8
+MAX_CORRECTIONS = 3
+CORRECTION_CUTOFF = 0.75
+
+_TERM_RE = re.compile(r'[^\W_]+')
+
+
+def _document(table=''):
+    return PG_DOCUMENT.format(table=f'"{table}".' if table else '')
+
+
+class Match(Lookup):
+    """FTS5 ``MATCH`` against the table's hidden column."""
+    
+    lookup_name = 'match'
+    
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+ProductSearchDocument._meta.get_field('document').register_lookup(Match)
+
+
+def install_index(connection):
+    """Create the search index for this database if it is missing; idempotent."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS products_search_idx ON products USING gin (({_document()}))')
+        return False
+
+    if connection.vendor != 'sqlite':
+        return False
+
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+    assignments = ', '.join(f'{column} = new.{column}' for column in SEARCH_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+        table = cursor.fetchone()
+        if table and 'product_id' not in table[0]:
+            # Keyed on products' rowid by an earlier version
+            drop_index(connection)
+        else:
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'products_fts_%'")
+            if cursor.fetchone()[0] == 3:
+                return False
+
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(product_id UNINDEXED, {columns}, '
+            f"tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS products_fts_vocab USING fts5vocab(products_fts, 'row')")
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN '
+            f'INSERT INTO products_fts(product_id, {columns}) VALUES (new.id, {new_values}); END'
+        )
+        # product_id is not indexed, so these scan the index's rows; product
+        # writes are rare next to searches
+        cursor.execute(
+            'CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN '
+            'DELETE FROM products_fts WHERE product_id = old.id; END'
+        )
+        # Only text changes touch the index, not stock or price updates
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF {columns} ON products BEGIN '
+            f'UPDATE products_fts SET {assignments} WHERE product_id = old.id; END'
+        )
+    # Rows written while the triggers were missing
+    rebuild_index(connection)
+    return True
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS products_search_idx')
+        elif connection.vendor == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS products_fts_{trigger}')
+            cursor.execute('DROP TABLE IF EXISTS products_fts_vocab')
+            cursor.execute('DROP TABLE IF EXISTS products_fts')
+
+
+def rebuild_index(connection):
+    """Re-index every product (SQLite); PostgreSQL's expression index needs no rebuild."""
+    if connection.vendor == 'sqlite':
+        columns = ', '.join(SEARCH_COLUMNS)
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute('DELETE FROM products_fts')
+            cursor.execute(f'INSERT INTO products_fts(product_id, {columns}) SELECT id, {columns} FROM products')
+    _vocabularies.pop(connection.alias, None)
+
+
+_vocabularies = {}
+_vocabulary_lock = threading.Lock()
+
+
+def vocabulary(using='default'):
+    """Sorted indexed words, rebuilt every ``PRODUCT_SEARCH_VOCABULARY_TTL`` seconds."""
+    cached = _vocabularies.get(using)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    with _vocabulary_lock:
+        cached = _vocabularies.get(using)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(
+                    'SELECT word FROM ts_stat(%s)',
+                    [f'SELECT {_document()} FROM products WHERE is_active'],
+                )
+            else:
+                cursor.execute('SELECT term FROM products_fts_vocab')
+            words = sorted(row[0] for row in cursor.fetchall())
+
+        ttl = getattr(settings, 'PRODUCT_SEARCH_VOCABULARY_TTL', 300)
+        _vocabularies[using] = (time.monotonic() + ttl, words)
+        return words
+
+
+def _alternatives(term, words):
+    """The term itself, plus its closest indexed words if nothing starts with it."""
+    i = bisect_left(words, term)
+    if i < len(words) and words[i].startswith(term):
+        return [term]
+
+    # Typos rarely hit the first letter, so only compare words sharing it
+    start = bisect_left(words, term[0])
+    end = bisect_left(words, chr(ord(term[0]) + 1))
+    matches = difflib.get_close_matches(term, words[start:end], n=MAX_CORRECTIONS, cutoff=CORRECTION_CUTOFF)
+    return [term] + [match for match in matches if match != term]
+
+
+def parse_query(query, using='default'):
+    """Lowercased query terms, each with its typo alternatives; at most ``MAX_TERMS``."""
+    terms = _TERM_RE.findall(query.lower())[:MAX_TERMS]
+    if not terms:
+        return []
+    words = vocabulary(using)
+    return [_alternatives(term, words) for term in terms]
+
+
+def search_products(queryset, query, rank=True):
+    """
+    Filter a Product queryset to full-text matches of ``query``, annotated
+    with ``search_rank`` (higher is more relevant) unless ``rank`` is False.
+    """
+    groups = parse_query(query, queryset.db)
+    if not groups:
+        return queryset
+
+    table = queryset.model._meta.db_table
+    if connections[queryset.db].vendor == 'postgresql':
+        tsquery = ' & '.join(
+            '(' + ' | '.join(f'{term}:*' for term in group) + ')' for group in groups
+        )
+        document = _document(table)
+        match = RawSQL(
+            f"{document} @@ to_tsquery('{PG_CONFIG}', %s)", [tsquery], output_field=BooleanField()
+        )
+        score = RawSQL(
+            f"ts_rank_cd({document}, to_tsquery('{PG_CONFIG}', %s))", [tsquery], output_field=FloatField()
+        )
+        results = queryset.filter(match)
+        return results.annotate(search_rank=score) if rank else results
+
+    fts_query = ' AND '.join(
+        '(' + ' OR '.join(f'"{term}"*' for term in group) + ')' for group in groups
+    )
+    # Joined rather than queried per row: a correlated FTS5 subquery re-runs
+    # the match for every product. bm25() is lower for better matches and
+    # weighs every column, starting with the unindexed product_id.
+    results = queryset.filter(search_document__document__match=fts_query)
+    if not rank:
+        return results
+    weights = [Value(weight) for weight in [0.0] + SQLITE_BM25_WEIGHTS]
+    score = Func(F('search_document__document'), *weights, function='bm25', output_field=FloatField())
+    return results.annotate(search_rank=-score)
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    ``?search=`` through the full-text index. Results are ordered by rank
+    unless the request passes an explicit ordering, so list this backend
+    after ``OrderingFilter``.
+    """
+    
+    def filter_queryset(self, request, queryset, view, rank=True):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        if connections[queryset.db].vendor not in ('postgresql', 'sqlite'):
+            # No index to use: plain LIKE matching over the view's search_fields
+            return super().filter_queryset(request, queryset, view)
+        
+        results = search_products(queryset, query, rank=rank)
+        if rank and results is not queryset and not request.query_params.get(api_settings.ORDERING_PARAM):
+            results = results.order_by('-search_rank', *queryset.query.order_by)
+        return results
@@ -12,6 +12,10 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'description', 'image', 'is_active', 'product_count']
     
     def get_product_count(self, obj):
+        # Views annotate the count via Category.objects.with_product_count();
+        # fall back to a query for instances that were not annotated.
+        if hasattr(obj, 'active_product_count'):
+            return obj.active_product_count
         return obj.products.filter(is_active=True).count()
 
 
@@ -0,0 +1,241 @@
+"""
+Typeahead suggestions for the catalog search box.
+
+Active product names, brands and active category names are held in memory as
+sorted arrays of keys: every word-start suffix of each normalised label
+("wireless headphones", "headphones"). Products get one array and the much
+smaller set of categories and brands another. A lookup bisects each array to
+the first key at or after the typed prefix and scans forward, with no
+database access: every category and brand match is considered, product
+matches only up to ``MAX_SCAN`` keys.
+
+Each process builds its index lazily and patches it when products or
+categories are saved or deleted in that process (see ``apps.py``). It is also
+rebuilt every ``PRODUCT_SUGGEST_INDEX_TTL`` seconds, to pick up writes made by
+other processes and bulk updates that send no signals.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import Category, Product
+
+KIND_ORDER = {'category': 0, 'brand': 1, 'product': 2}
+# Product keys scanned per lookup before ranking, so very short prefixes stay
+# cheap; category and brand keys are few and always scanned in full
+MAX_SCAN = 400
+MAX_KEY_LENGTH = 64
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    """Lowercase, accent-free words joined by single spaces."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(_WORD_RE.findall(text.lower()))
+
+
+def index_keys(label):
+    """``(suffix, word position)`` for every word-start suffix of the normalised label."""
+    words = normalize(label).split(' ')
+    return {(' '.join(words[i:])[:MAX_KEY_LENGTH], i) for i in range(len(words)) if words[i]}
+
+
+def product_entry(product):
+    return {
+        'type': 'product',
+        'label': product.name,
+        'slug': product.slug,
+        'id': str(product.pk),
+        'brand': product.brand,
+        'weight': 1 if product.is_featured else 0,
+    }
+
+
+def category_entry(category, product_count=0):
+    return {
+        'type': 'category',
+        'label': category.name,
+        'slug': category.slug,
+        'id': str(category.pk),
+        'weight': product_count,
+    }
+
+
+def brand_entry(brand, product_count):
+    return {'type': 'brand', 'label': brand, 'weight': product_count}
+
+
+def key_group(entry_id):
+    """Which key array an entry is indexed in: ``'product'`` or ``'label'`` (categories and brands)."""
+    return 'product' if entry_id[0] == 'product' else 'label'
+
+
+class SuggestIndex:
+    """
+    Sorted ``(key, word position, entry_id)`` per key group over a dict of
+    entries. Instances are never mutated once published: changes build a new
+    index and swap it in, so lookups need no lock.
+    """
+    
+    def __init__(self, entries, keys=None):
+        self.entries = entries
+        if keys is None:
+            keys = {'product': [], 'label': []}
+            for entry_id, entry in entries.items():
+                keys[key_group(entry_id)].extend(
+                    (key, position, entry_id) for key, position in index_keys(entry['label'])
+                )
+            for group_keys in keys.values():
+                group_keys.sort()
+        self.keys = keys
+    
+    @classmethod
+    def build(cls):
+        entries = {}
+        brands = {}
+        products = Product.objects.filter(is_active=True).order_by().only(
+            'id', 'name', 'slug', 'brand', 'is_featured'
+        )
+        for product in products.iterator(chunk_size=2000):
+            entries[('product', str(product.pk))] = product_entry(product)
+            if product.brand:
+                brands[product.brand] = brands.get(product.brand, 0) + 1
+        for brand, count in brands.items():
+            entries[('brand', brand)] = brand_entry(brand, count)
+        categories = Category.objects.filter(is_active=True).order_by().annotate(
+            product_count=Count('products', filter=Q(products__is_active=True))
+        )
+        for category in categories:
+            entries[('category', str(category.pk))] = category_entry(category, category.product_count)
+        return cls(entries)
+    
+    def lookup(self, query, limit=8):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        
+        seen = {}
+        for group, max_scan in (('label', None), ('product', MAX_SCAN)):
+            keys = self.keys[group]
+            i = bisect_left(keys, (prefix,))
+            end = len(keys) if max_scan is None else min(i + max_scan, len(keys))
+            while i < end and keys[i][0].startswith(prefix):
+                _, position, entry_id = keys[i]
+                # Prefer a match at the start of the label over one further in
+                seen[entry_id] = seen.get(entry_id, False) or position == 0
+                i += 1
+        
+        ranked = sorted(
+            seen.items(),
+            key=lambda item: (
+                not item[1],
+                KIND_ORDER[self.entries[item[0]]['type']],
+                -self.entries[item[0]]['weight'],
+                self.entries[item[0]]['label'],
+            ),
+        )
+        return [
+            {k: v for k, v in self.entries[entry_id].items() if k != 'weight'}
+            for entry_id, _ in ranked[:limit]
+        ]
+    
+    def replace(self, changes):
+        """
+        A new index with ``changes`` (entry_id -> entry, or None to remove)
+        applied; keys of untouched entries are reused as they are.
+        """
+        entries = dict(self.entries)
+        keys = {
+            group: [item for item in group_keys if item[2] not in changes]
+            if any(key_group(entry_id) == group for entry_id in changes) else group_keys
+            for group, group_keys in self.keys.items()
+        }
+        for entry_id, entry in changes.items():
+            if entry is None:
+                entries.pop(entry_id, None)
+                continue
+            entries[entry_id] = entry
+            for key, position in index_keys(entry['label']):
+                insort(keys[key_group(entry_id)], (key, position, entry_id))
+        return SuggestIndex(entries, keys)
+
+
+_index = None
+_built_at = 0.0
+_lock = threading.Lock()
+
+
+def get_index():
+    """This process's index, rebuilt when older than ``PRODUCT_SUGGEST_INDEX_TTL``."""
+    global _index, _built_at
+    ttl = getattr(settings, 'PRODUCT_SUGGEST_INDEX_TTL', 300)
+    if _index is not None and time.monotonic() - _built_at < ttl:
+        return _index
+
+    # Other requests keep using the stale index while one thread rebuilds it
+    if not _lock.acquire(blocking=_index is None):
+        return _index
+    try:
+        if _index is None or time.monotonic() - _built_at >= ttl:
+            _index = SuggestIndex.build()
+            _built_at = time.monotonic()
+        return _index
+    finally:
+        _lock.release()
+
+
+def suggest(query, limit=8):
+    return get_index().lookup(query, limit)
+
+
+def _apply(changes_for):
+    """Patch the index, if this process has built one, with ``changes_for(index)``."""
+    global _index
+    with _lock:
+        if _index is not None:
+            _index = _index.replace(changes_for(_index))
+
+
+def _brand_change(index, brand, delta):
+    entry = index.entries.get(('brand', brand))
+    count = (entry['weight'] if entry else 0) + delta
+    return brand_entry(brand, count) if count > 0 else None
+
+
+def product_changed(product, deleted=False):
+    def changes_for(index):
+        entry_id = ('product', str(product.pk))
+        old = index.entries.get(entry_id)
+        new = product_entry(product) if product.is_active and not deleted else None
+        changes = {entry_id: new}
+
+        old_brand = old['brand'] if old else ''
+        new_brand = new['brand'] if new else ''
+        if old_brand != new_brand:
+            if old_brand:
+                changes[('brand', old_brand)] = _brand_change(index, old_brand, -1)
+            if new_brand:
+                changes[('brand', new_brand)] = _brand_change(index, new_brand, 1)
+        return changes
+
+    _apply(changes_for)
+
+
+def category_changed(category, deleted=False):
+    def changes_for(index):
+        entry_id = ('category', str(category.pk))
+        if deleted or not category.is_active:
+            return {entry_id: None}
+        # Keep the product count from the last rebuild; it only orders categories
+        old = index.entries.get(entry_id)
+        return {entry_id: category_entry(category, old['weight'] if old else 0)}
+
+    _apply(changes_for)
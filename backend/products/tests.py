@@ -0,0 +1,93 @@
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from .models import Category, Product
+from .search import SEARCH_COLUMNS, drop_index, install_index, search_products
+from .suggest import MAX_SCAN, SuggestIndex, brand_entry
+
+
+class SuggestIndexTests(SimpleTestCase):
+    
+    def product(self, i, label):
+        return {'type': 'product', 'label': label, 'slug': f'p-{i}', 'id': str(i), 'brand': '', 'weight': 0}
+    
+    def test_short_prefix_still_finds_categories_and_brands_past_the_product_scan(self):
+        entries = {('product', str(i)): self.product(i, f'Saber {i:04d}') for i in range(MAX_SCAN * 2)}
+        entries[('category', 'c1')] = {'type': 'category', 'label': 'Sports', 'slug': 'sports', 'id': 'c1', 'weight': 5}
+        entries[('brand', 'Sony')] = brand_entry('Sony', 3)
+        
+        labels = [item['label'] for item in SuggestIndex(entries).lookup('s', limit=3)]
+        
+        self.assertEqual(labels, ['Sports', 'Sony', 'Saber 0000'])
+
+
+class ProductFacetTests(TestCase):
+    
+    def setUp(self):
+        category = Category.objects.create(name='Books', slug='books')
+        for i, stock in enumerate([0, 3, 7]):
+            Product.objects.create(
+                name=f'Book {i}', slug=f'book-{i}', sku=f'BK-{i}', description='',
+                price=100, stock=stock, category=category,
+            )
+    
+    def in_stock_facet(self, value):
+        response = self.client.get('/api/products/', {'in_stock': value, 'facets': 'true'})
+        self.assertEqual(response.status_code, 200)
+        return response.data['count'], {item['value']: item for item in response.data['facets']['in_stock']}
+    
+    def test_in_stock_selection_matches_the_listing(self):
+        count, facet = self.in_stock_facet('false')
+        self.assertEqual(count, 1)
+        self.assertTrue(facet['false']['selected'])
+        self.assertEqual((facet['true']['count'], facet['false']['count']), (2, 1))
+    
+    def test_unrecognised_in_stock_is_ignored_by_listing_and_facets(self):
+        count, facet = self.in_stock_facet('maybe')
+        self.assertEqual(count, 3)
+        self.assertFalse(any(item['selected'] for item in facet.values()))
+
+
+class ProductSearchTests(TestCase):
+    
+    def setUp(self):
+        category = Category.objects.create(name='Lighting', slug='lighting')
+        self.lamp = Product.objects.create(
+            name='Desk Lamp', slug='desk-lamp', sku='LT-1', description='Adjustable arm', price=20, category=category,
+        )
+        self.bulb = Product.objects.create(
+            name='Bulb', slug='bulb', sku='LT-2', description='Fits any lamp', price=2, category=category,
+        )
+    
+    def search(self, query):
+        return [product.slug for product in search_products(Product.objects.all(), query).order_by('-search_rank')]
+    
+    def test_ranks_name_matches_first_and_follows_writes(self):
+        self.assertEqual(self.search('lamp'), ['desk-lamp', 'bulb'])
+        
+        self.bulb.description = 'Warm white'
+        self.bulb.save()
+        self.assertEqual(self.search('lamp'), ['desk-lamp'])
+        
+        self.lamp.delete()
+        self.assertEqual(self.search('lamp'), [])
+        self.assertEqual(self.search('warm'), ['bulb'])
+    
+    def test_matches_follow_product_ids_when_rowids_change(self):
+        # As VACUUM may do for a table without an integer primary key
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE products SET rowid = 1000 + (SELECT max(rowid) FROM products) - rowid')
+        
+        self.assertEqual(self.search('adjustable'), ['desk-lamp'])
+        self.assertEqual(self.search('fits'), ['bulb'])
+    
+    def test_install_replaces_a_rowid_keyed_index(self):
+        drop_index(connection)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE products_fts USING fts5({', '.join(SEARCH_COLUMNS)}, "
+                f"content='products', content_rowid='rowid')"
+            )
+        
+        self.assertTrue(install_index(connection))
+        self.assertEqual(self.search('lamp'), ['desk-lamp', 'bulb'])
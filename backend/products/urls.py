@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
     CategoryListView, ProductListView, ProductDetailView,
-    FeaturedProductsView, ProductsByCategoryView,
+    FeaturedProductsView, ProductsByCategoryView, ProductSuggestView,
     AdminProductListCreateView, AdminProductDetailView,
     AdminCategoryListCreateView, AdminCategoryDetailView
 )
@@ -11,6 +11,7 @@ urlpatterns = [
     path('', ProductListView.as_view(), name='product-list'),
     path('categories/', CategoryListView.as_view(), name='category-list'),
     path('featured/', FeaturedProductsView.as_view(), name='featured-products'),
+    path('suggest/', ProductSuggestView.as_view(), name='product-suggest'),
     path('category/<slug:category_slug>/', ProductsByCategoryView.as_view(), name='products-by-category'),
     path('<slug:slug>/', ProductDetailView.as_view(), name='product-detail'),
     
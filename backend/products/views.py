@@ -1,8 +1,13 @@
 from rest_framework import generics, permissions, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.db.models import Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Category, Product
+from .facets import FACETS, facet_counts
+from .filters import ProductFilter
+from .search import ProductSearchFilter
+from .suggest import suggest
 from .serializers import (
     CategorySerializer, ProductListSerializer,
     ProductDetailSerializer, ProductCreateUpdateSerializer
@@ -12,28 +17,50 @@ from .serializers import (
 class CategoryListView(generics.ListAPIView):
     """List all active categories."""
     
-    queryset = Category.objects.filter(is_active=True)
+    queryset = Category.objects.filter(is_active=True).with_product_count()
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
 
 
 class ProductListView(generics.ListAPIView):
-    """List all active products with filtering and search."""
+    """
+    List all active products with filtering and full-text search (ranked by
+    relevance). ``?facets=true`` adds per-value counts for the category,
+    brand, price range and stock filters to the page.
+    """
     
     queryset = Product.objects.filter(is_active=True).select_related('category')
     serializer_class = ProductListSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category', 'brand', 'is_featured']
+    # Search last, so it can order by relevance when no ordering is requested
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ProductSearchFilter]
+    filterset_class = ProductFilter
     search_fields = ['name', 'description', 'brand', 'sku']
     ordering_fields = ['price', 'created_at', 'name']
     ordering = ['-created_at']
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get('facets', '').lower() in ('true', '1', 'yes'):
+            response.data['facets'] = self.get_facets()
+        return response
+    
+    def get_facets(self):
+        """Facet counts over the search and non-facet filters of this request."""
+        params = self.request.query_params.copy()
+        selected = {facet: params.pop(facet, [None])[-1] for facet in FACETS}
+        queryset = ProductFilter(params, queryset=self.get_queryset(), request=self.request).qs
+        queryset = ProductSearchFilter().filter_queryset(self.request, queryset, self, rank=False)
+        return facet_counts(queryset, selected)
 
 
 class ProductDetailView(generics.RetrieveAPIView):
     """Get product detail."""
     
-    queryset = Product.objects.filter(is_active=True).select_related('category').prefetch_related('images')
+    queryset = Product.objects.filter(is_active=True).prefetch_related(
+        Prefetch('category', queryset=Category.objects.with_product_count()),
+        'images'
+    )
     serializer_class = ProductDetailSerializer
     permission_classes = [permissions.AllowAny]
     lookup_field = 'slug'
@@ -53,7 +80,7 @@ class ProductsByCategoryView(generics.ListAPIView):
     
     serializer_class = ProductListSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.OrderingFilter, ProductSearchFilter]
     search_fields = ['name', 'description', 'brand']
     ordering_fields = ['price', 'created_at', 'name']
     
@@ -65,6 +92,27 @@ class ProductsByCategoryView(generics.ListAPIView):
         ).select_related('category')
 
 
+class ProductSuggestView(APIView):
+    """
+    Typeahead suggestions (categories, brands and products) for ``?q=``,
+    answered from the in-process prefix index in ``products.suggest``.
+    """
+    
+    permission_classes = [permissions.AllowAny]
+    # Anonymous and database-free: no token/session lookups, no session row
+    authentication_classes = []
+    creates_session = False
+    max_limit = 20
+    
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', 8)), 1), self.max_limit)
+        except ValueError:
+            limit = 8
+        return Response({'query': query, 'suggestions': suggest(query, limit)})
+
+
 # Admin Views
 class AdminProductListCreateView(generics.ListCreateAPIView):
     """Admin: List and create products."""
@@ -92,7 +140,7 @@ class AdminProductDetailView(generics.RetrieveUpdateDestroyAPIView):
 class AdminCategoryListCreateView(generics.ListCreateAPIView):
     """Admin: List and create categories."""
     
-    queryset = Category.objects.all()
+    queryset = Category.objects.with_product_count()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAdminUser]
 
@@ -100,6 +148,6 @@ class AdminCategoryListCreateView(generics.ListCreateAPIView):
 class AdminCategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Admin: Get, update, delete category."""
     
-    queryset = Category.objects.all()
+    queryset = Category.objects.with_product_count()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAdminUser]
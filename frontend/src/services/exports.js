@@ -0,0 +1,30 @@
+import api from './api'
+
+const POLL_INTERVAL = 1000
+const MAX_WAIT = 10 * 60 * 1000
+
+const wait = (ms) => new Promise((resolve) => setTimeout(resolve, ms))
+
+// Submit a background export job, poll until it finishes and download the file
+export async function downloadExport(kind, params = {}) {
+  let { data: job } = await api.post('/orders/admin/export/jobs/', { kind, params })
+  const startedAt = Date.now()
+
+  while (job.status === 'pending' || job.status === 'running') {
+    if (Date.now() - startedAt > MAX_WAIT) {
+      throw new Error('Export is taking too long')
+    }
+    await wait(POLL_INTERVAL)
+    const response = await api.get(`/orders/admin/export/jobs/${job.id}/`)
+    job = response.data
+  }
+
+  if (job.status !== 'completed') {
+    throw new Error(job.error || 'Export failed')
+  }
+
+  return api.get(`/orders/admin/export/jobs/${job.id}/download/`, {
+    responseType: 'blob',
+    timeout: 0,
+  })
+}
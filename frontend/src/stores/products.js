@@ -1,6 +1,13 @@
 import { defineStore } from 'pinia'
 import api from '@/services/api'
 
+// Interactions are queued and sent to the batch endpoint together instead of
+// one request per view/click
+const TRACK_FLUSH_DELAY = 1000
+const TRACK_MAX_BATCH = 50
+let pendingInteractions = []
+let flushTimer = null
+
 export const useProductStore = defineStore('products', {
   state: () => ({
     products: [],
@@ -36,7 +43,7 @@ export const useProductStore = defineStore('products', {
         if (!params.search && this.filters.search) {
           queryParams.search = this.filters.search
         }
-        if (!params.ordering && this.filters.ordering) {
+        if (!('ordering' in params) && this.filters.ordering) {
           queryParams.ordering = this.filters.ordering
         }
         
@@ -86,8 +93,8 @@ export const useProductStore = defineStore('products', {
         const response = await api.get(`/products/${slug}/`)
         this.currentProduct = response.data
         
-        // Track view interaction
-        await this.trackInteraction(response.data.id, 'view')
+        // Track view interaction (sent with the next batch)
+        this.trackInteraction(response.data.id, 'view')
         
         return response.data
       } catch (error) {
@@ -116,15 +123,43 @@ export const useProductStore = defineStore('products', {
       }
     },
 
-    async trackInteraction(productId, interactionType, metadata = {}) {
+    async fetchSuggestions(query, limit = 8) {
       try {
-        await api.post('/analytics/track/', {
-          product_id: productId,
-          interaction_type: interactionType,
-          metadata,
-        })
+        const response = await api.get('/products/suggest/', { params: { q: query, limit } })
+        return response.data.suggestions
+      } catch (error) {
+        console.error('Error fetching suggestions:', error)
+        return []
+      }
+    },
+
+    trackInteraction(productId, interactionType, metadata = {}) {
+      pendingInteractions.push({
+        product_id: productId,
+        interaction_type: interactionType,
+        metadata,
+      })
+
+      if (pendingInteractions.length >= TRACK_MAX_BATCH) {
+        return this.flushInteractions()
+      }
+      if (!flushTimer) {
+        flushTimer = setTimeout(() => this.flushInteractions(), TRACK_FLUSH_DELAY)
+      }
+    },
+
+    async flushInteractions() {
+      clearTimeout(flushTimer)
+      flushTimer = null
+
+      const interactions = pendingInteractions
+      pendingInteractions = []
+      if (!interactions.length) return
+
+      try {
+        await api.post('/analytics/track/batch/', { interactions })
       } catch (error) {
-        console.error('Error tracking interaction:', error)
+        console.error('Error tracking interactions:', error)
       }
     },
 